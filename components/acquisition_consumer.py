@@ -0,0 +1,154 @@
+import itertools
+import threading
+import time
+import numpy as np
+import flim_labs
+from components.decay_accumulators import DecayAccumulators
+from components.intensity_trace_buffer import IntensityTraceBuffer
+
+ACQUISITION_HARMONICS = (1, 2, 3, 4)
+# Intensity samples kept between two rendered frames, the oldest are overwritten
+INTENSITY_SAMPLES_CAPACITY = 65536
+CONSUMER_IDLE_SLEEP_S = 0.002
+
+
+def decode_packets(packets):
+    # Splits a drained batch into {channel: (times_ns, curves)} with curves as a
+    # (n_packets, num_bins) uint64 array, and {(channel, harmonic): (n, 2) points}
+    curves_packets = []
+    phasors_packets = {}
+    for packet in packets:
+        if "sp_phasors" in packet[0]:
+            key = (packet[1][0], packet[2][0])
+            phasors_packets.setdefault(key, []).append(packet[3])
+        else:
+            curves_packets.append(packet)
+    channels_curves = {}
+    if curves_packets:
+        channels = np.fromiter(
+            (packet[0][0] for packet in curves_packets),
+            dtype=np.int64,
+            count=len(curves_packets),
+        )
+        times_ns = np.fromiter(
+            (packet[1][0] for packet in curves_packets),
+            dtype=np.float64,
+            count=len(curves_packets),
+        )
+        curves = np.array([packet[2] for packet in curves_packets], dtype=np.uint64)
+        for channel in np.unique(channels):
+            selected = channels == channel
+            channels_curves[int(channel)] = (times_ns[selected], curves[selected])
+    channels_phasors = {
+        key: np.array(
+            list(itertools.chain.from_iterable(points)), dtype=np.float64
+        ).reshape(-1, 2)
+        for key, points in phasors_packets.items()
+    }
+    return channels_curves, channels_phasors
+
+
+class ChannelBuffers:
+    # Intensity and phasors of a channel received since the last snapshot, the
+    # decays are summed by the consumer DecayAccumulators
+    def __init__(self):
+        self.intensity = IntensityTraceBuffer(INTENSITY_SAMPLES_CAPACITY)
+        self.last_time_ns = None
+        self.phasors = {harmonic: [] for harmonic in ACQUISITION_HARMONICS}
+
+    def add_curves(self, times_ns, curves):
+        # curves: (n_packets, num_bins), one intensity sample per packet
+        self.intensity.extend(times_ns, curves.sum(axis=1, dtype=np.uint64))
+        self.last_time_ns = times_ns[-1]
+
+    def add_phasors(self, harmonic, points):
+        if harmonic in self.phasors:
+            self.phasors[harmonic].append(points)
+
+    def take(self, decay):
+        # Returns the data received since the last call and resets the buffers
+        intensity_times_ns, intensity_counts = self.intensity.data()
+        snapshot = ChannelSnapshot(
+            decay,
+            intensity_times_ns.copy(),
+            intensity_counts.copy(),
+            self.last_time_ns,
+            {
+                harmonic: np.concatenate(points)
+                for harmonic, points in self.phasors.items()
+                if points
+            },
+        )
+        self.intensity.clear()
+        for points in self.phasors.values():
+            points.clear()
+        return snapshot
+
+
+class ChannelSnapshot:
+    def __init__(self, decay, intensity_times_ns, intensity_counts, last_time_ns, phasors):
+        self.decay = decay
+        self.intensity_times_ns = intensity_times_ns
+        self.intensity_counts = intensity_counts
+        self.last_time_ns = last_time_ns
+        self.phasors = phasors
+
+    def has_curves(self):
+        return len(self.intensity_times_ns) > 0
+
+
+class AcquisitionConsumer(threading.Thread):
+    # Drains flim_labs.pull_from_queue() in the background into per channel
+    # buffers, the GUI takes a snapshot of them at its own frame rate
+    def __init__(self, channels):
+        super().__init__(daemon=True)
+        self.lock = threading.Lock()
+        self.buffers = {channel: ChannelBuffers() for channel in channels}
+        # Decays summed since the last snapshot
+        self.decays = DecayAccumulators()
+        self.dirty = set()
+        self.ended = False
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            packets = flim_labs.pull_from_queue()
+            if len(packets) == 0:
+                time.sleep(CONSUMER_IDLE_SLEEP_S)
+                continue
+            ended = ("end",) in packets  # End of acquisition
+            if ended:
+                packets = packets[: packets.index(("end",))]
+            channels_curves, channels_phasors = decode_packets(packets)
+            with self.lock:
+                self.add_batch(channels_curves, channels_phasors)
+                if ended:
+                    self.ended = True
+                    return
+
+    def add_batch(self, channels_curves, channels_phasors):
+        for channel, (times_ns, curves) in channels_curves.items():
+            if channel in self.buffers:
+                self.decays.add_batch(channel, curves)
+                self.buffers[channel].add_curves(times_ns, curves)
+                self.dirty.add(channel)
+        for (channel, harmonic), points in channels_phasors.items():
+            if channel in self.buffers:
+                self.buffers[channel].add_phasors(harmonic, points)
+                self.dirty.add(channel)
+
+    def take_snapshot(self):
+        # Returns ({channel: ChannelSnapshot}, ended) of the channels that received
+        # packets since the last snapshot
+        with self.lock:
+            snapshot = {
+                channel: self.buffers[channel].take(self.decays.sums.get(channel))
+                for channel in sorted(self.dirty)
+            }
+            # New sums, the snapshot keeps the previous arrays
+            self.decays.clear()
+            self.dirty.clear()
+            return snapshot, self.ended
+
+    def stop(self):
+        self.stop_event.set()
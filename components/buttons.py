@@ -224,6 +224,7 @@ class ExportPlotImageButton(QWidget):
         self.app = app
         self.show = show
         self.data = None
+        self.phasors_data_task = None
         self.export_img_button = self.create_button()
         layout = QVBoxLayout()
         layout.setSpacing(0)
@@ -252,32 +253,39 @@ class ExportPlotImageButton(QWidget):
 
     def on_export_plot_image(self):
         if self.app.tab_selected == TAB_SPECTROSCOPY:
-            channels_curves, times, metadata = (
+            channels_decays, times, metadata = (
                 ReadData.prepare_spectroscopy_data_for_export_img(self.app)
             )
             plot = plot_spectroscopy_data(
-                channels_curves, times, metadata, show_plot=False
+                channels_decays, times, metadata, show_plot=False
             )
             ReadData.save_plot_image(plot)
         if self.app.tab_selected == TAB_PHASORS:
-            (
-                phasors_data,
-                laser_period,
-                active_channels,
-                spectroscopy_times,
-                spectroscopy_curves,
-            ) = ReadData.prepare_phasors_data_for_export_img(self.app)
-            plot = plot_phasors_data(
-                phasors_data,
-                laser_period,
-                active_channels,
-                spectroscopy_times,
-                spectroscopy_curves,
-                self.app.phasors_harmonic_selected,
-                show_plot=False,
+            # The points of a file opened from its summary are decoded first
+            self.phasors_data_task = ReadData.load_phasors_data(
+                self.app, self.export_phasors_plot_image
             )
-            ReadData.save_plot_image(plot)
         if self.app.tab_selected == TAB_FITTING:
             if self.data:
                 plot = plot_fitting_data(self.data, show_plot=False)
                 ReadData.save_plot_image(plot)
+
+    def export_phasors_plot_image(self):
+        self.phasors_data_task = None
+        (
+            phasors_data,
+            laser_period,
+            active_channels,
+            spectroscopy_times,
+            spectroscopy_decays,
+        ) = ReadData.prepare_phasors_data_for_export_img(self.app)
+        plot = plot_phasors_data(
+            phasors_data,
+            laser_period,
+            active_channels,
+            spectroscopy_times,
+            spectroscopy_decays,
+            self.app.phasors_harmonic_selected,
+            show_plot=False,
+        )
+        ReadData.save_plot_image(plot)
@@ -0,0 +1,232 @@
+import json
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from components.phasors_file import (
+    PHASORS_MAGIC_BYTES,
+    PHASORS_RECORD_DTYPE,
+    PhasorsData,
+    read_phasors_bin,
+)
+from components.spectroscopy_file import (
+    SPECTROSCOPY_MAGIC_BYTES,
+    SPECTROSCOPY_NUM_BINS,
+    SPECTROSCOPY_READ_CHUNK_BYTES,
+    iter_spectroscopy_chunks,
+    read_metadata,
+    sum_spectroscopy_bin,
+)
+
+CONVERTED_FILE_EXTENSION = ".parquet"
+CONVERTED_FILE_COMPRESSION = "zstd"
+
+
+def converted_file_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}{CONVERTED_FILE_EXTENSION}"
+
+
+def find_converted_file(file_path):
+    # A converted file older than its .bin is stale and ignored
+    converted_file = converted_file_path(file_path)
+    if os.path.exists(converted_file) and os.path.getmtime(
+        converted_file
+    ) >= os.path.getmtime(file_path):
+        return converted_file
+    return None
+
+
+def spectroscopy_channel_column(channel):
+    return f"channel_{channel}"
+
+
+def spectroscopy_schema(metadata):
+    fields = [pa.field("time_ns", pa.float64())]
+    for channel in metadata["channels"]:
+        fields.append(
+            pa.field(
+                spectroscopy_channel_column(channel),
+                pa.list_(pa.uint32(), SPECTROSCOPY_NUM_BINS),
+            )
+        )
+    return pa.schema(fields, metadata=converted_file_metadata(metadata, SPECTROSCOPY_MAGIC_BYTES))
+
+
+def phasors_schema(metadata):
+    return pa.schema(
+        [
+            pa.field(name, pa.from_numpy_dtype(PHASORS_RECORD_DTYPE[name]))
+            for name in PHASORS_RECORD_DTYPE.names
+        ],
+        metadata=converted_file_metadata(metadata, PHASORS_MAGIC_BYTES),
+    )
+
+
+def converted_file_metadata(metadata, magic_bytes):
+    return {b"format": magic_bytes, b"header": json.dumps(metadata).encode("utf-8")}
+
+
+def read_converted_metadata(parquet_file):
+    schema_metadata = parquet_file.schema_arrow.metadata
+    return json.loads(schema_metadata[b"header"].decode("utf-8"))
+
+
+def convert_spectroscopy_bin(file_path, output_file, chunk_bytes, progress_callback):
+    with open(file_path, "rb") as f:
+        if f.read(4) != SPECTROSCOPY_MAGIC_BYTES:
+            raise ValueError(f"Invalid file. {file_path} is not a valid Spectroscopy file")
+        metadata = read_metadata(f)
+        schema = spectroscopy_schema(metadata)
+        # Every chunk becomes a row group
+        with pq.ParquetWriter(
+            output_file, schema, compression=CONVERTED_FILE_COMPRESSION
+        ) as writer:
+            for records in iter_spectroscopy_chunks(
+                f, len(metadata["channels"]), chunk_bytes, progress_callback
+            ):
+                # The chunk buffer is reused, the columns must own their data
+                columns = [pa.array(np.array(records["time"]))]
+                for i in range(len(metadata["channels"])):
+                    values = np.ascontiguousarray(records["curves"][:, i, :]).ravel()
+                    columns.append(
+                        pa.FixedSizeListArray.from_arrays(
+                            pa.array(values), SPECTROSCOPY_NUM_BINS
+                        )
+                    )
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+
+def convert_phasors_bin(file_path, output_file, chunk_bytes, progress_callback):
+    with open(file_path, "rb") as f:
+        if f.read(4) != PHASORS_MAGIC_BYTES:
+            raise ValueError(f"Invalid file. {file_path} is not a valid Phasors file")
+        metadata = read_metadata(f)
+        schema = phasors_schema(metadata)
+        record_size = PHASORS_RECORD_DTYPE.itemsize
+        buffer = bytearray(max(1, chunk_bytes // record_size) * record_size)
+        with pq.ParquetWriter(
+            output_file, schema, compression=CONVERTED_FILE_COMPRESSION
+        ) as writer:
+            while True:
+                bytes_read = f.readinto(buffer)
+                if progress_callback is not None:
+                    progress_callback(f.tell())
+                num_records = bytes_read // record_size
+                if num_records == 0:
+                    break
+                records = np.frombuffer(
+                    buffer, dtype=PHASORS_RECORD_DTYPE, count=num_records
+                )
+                writer.write_table(
+                    pa.Table.from_arrays(
+                        [pa.array(np.array(records[name])) for name in schema.names],
+                        schema=schema,
+                    )
+                )
+                if bytes_read < len(buffer):
+                    break
+
+
+def convert_bin_file(
+    file_path, progress_callback=None, chunk_bytes=SPECTROSCOPY_READ_CHUNK_BYTES
+):
+    # Writes <file>.parquet next to the .bin, the JSON header is kept in the schema metadata
+    with open(file_path, "rb") as f:
+        magic_bytes = f.read(4)
+    converters = {
+        SPECTROSCOPY_MAGIC_BYTES: convert_spectroscopy_bin,
+        PHASORS_MAGIC_BYTES: convert_phasors_bin,
+    }
+    if magic_bytes not in converters:
+        raise ValueError(f"Invalid file. {file_path} can not be converted")
+    output_file = converted_file_path(file_path)
+    tmp_file = f"{output_file}.tmp"
+    try:
+        converters[magic_bytes](file_path, tmp_file, chunk_bytes, progress_callback)
+        os.replace(tmp_file, output_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return output_file
+
+
+def row_groups_progress(parquet_file, num_row_groups, progress_callback):
+    # Parquet readers report the file position proportionally to the row groups read
+    file_size = os.path.getsize(parquet_file)
+    num_row_groups = max(num_row_groups, 1)
+
+    def on_row_group(index):
+        if progress_callback is not None:
+            progress_callback(file_size * (index + 1) // num_row_groups)
+
+    return on_row_group
+
+
+def sum_spectroscopy_parquet(parquet_file, progress_callback=None):
+    file = pq.ParquetFile(parquet_file)
+    metadata = read_converted_metadata(file)
+    channels = metadata["channels"]
+    decays = np.zeros((len(channels), SPECTROSCOPY_NUM_BINS), dtype=np.uint64)
+    times = []
+    on_row_group = row_groups_progress(
+        parquet_file, file.num_row_groups, progress_callback
+    )
+    for index in range(file.num_row_groups):
+        row_group = file.read_row_group(index)
+        times.append(row_group.column("time_ns").to_numpy() / 1_000_000_000)
+        for i, channel in enumerate(channels):
+            column = row_group.column(spectroscopy_channel_column(channel))
+            curves = column.combine_chunks().flatten().to_numpy()
+            decays[i] += np.sum(
+                curves.reshape(-1, SPECTROSCOPY_NUM_BINS), axis=0, dtype=np.uint64
+            )
+        on_row_group(index)
+    times = np.concatenate(times) if times else np.empty(0)
+    return metadata, times, decays
+
+
+def read_phasors_parquet(parquet_file, channels=None, progress_callback=None):
+    file = pq.ParquetFile(parquet_file)
+    metadata = read_converted_metadata(file)
+    on_row_group = row_groups_progress(
+        parquet_file, file.num_row_groups, progress_callback
+    )
+    columns = {name: [] for name in PHASORS_RECORD_DTYPE.names}
+    for index in range(file.num_row_groups):
+        row_group = file.read_row_group(index)
+        mask = (
+            np.isin(row_group.column("channel").to_numpy(), channels)
+            if channels is not None
+            else slice(None)
+        )
+        for name in columns:
+            columns[name].append(row_group.column(name).to_numpy()[mask])
+        on_row_group(index)
+    arrays = {
+        name: (
+            np.concatenate(values)
+            if values
+            else np.empty(0, dtype=PHASORS_RECORD_DTYPE[name])
+        )
+        for name, values in columns.items()
+    }
+    phasors_data = PhasorsData(
+        arrays["time_ns"], arrays["channel"], arrays["harmonic"], arrays["g"], arrays["s"]
+    )
+    return metadata, phasors_data
+
+
+def sum_spectroscopy_file(file_path, progress_callback=None):
+    # Prefers the converted file next to the .bin when there is one
+    converted_file = find_converted_file(file_path)
+    if converted_file is not None:
+        return sum_spectroscopy_parquet(converted_file, progress_callback)
+    return sum_spectroscopy_bin(file_path, progress_callback=progress_callback)
+
+
+def read_phasors_file(file_path, channels=None, progress_callback=None):
+    # Prefers the converted file next to the .bin when there is one
+    converted_file = find_converted_file(file_path)
+    if converted_file is not None:
+        return read_phasors_parquet(converted_file, channels, progress_callback)
+    return read_phasors_bin(file_path, channels, progress_callback)
@@ -0,0 +1,229 @@
+import json
+import os
+import numpy as np
+from components.time_tagger_file import channel_positions
+
+CORRELATOR_LAGS_PER_LEVEL = 16
+
+
+def merge_entries(bins, counts):
+    # Sums the (channels, n) counts of equal bins, bins must be sorted
+    if len(bins) == 0:
+        return bins, counts
+    starts = np.flatnonzero(np.concatenate(([True], bins[1:] != bins[:-1])))
+    return bins[starts], np.add.reduceat(counts, starts, axis=1)
+
+
+class MultiTauCorrelator:
+    # Streaming multi-tau auto and cross correlations of photon count streams
+    # binned at the same base width. Only the non empty bins are stored, as sorted
+    # bins with (channels, n) counts, and every channel is binned and coarsened
+    # once for all the pairs. The lag partners of the new bins are found with one
+    # pair of searchsorted per level, then visited by their position in the lag
+    # window, so the cost is O(photons * levels * window) whatever the acquisition
+    # length, with a window of a few bins for sparse streams. Level 0 covers lags
+    # 1..m-1, every next level halves the time resolution and covers lags m/2..m-1
+    def __init__(
+        self, num_levels, num_channels, pairs, lags_per_level=CORRELATOR_LAGS_PER_LEVEL
+    ):
+        # pairs: (a, b) channel positions in the counts
+        self.num_levels = num_levels
+        self.lags_per_level = lags_per_level
+        self.pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        m = lags_per_level
+        self.level_lags = [
+            np.arange(1 if level == 0 else m // 2, m) for level in range(num_levels)
+        ]
+        self.products = [
+            np.zeros((len(self.pairs), len(lags))) for lags in self.level_lags
+        ]
+        empty = (np.empty(0, dtype=np.int64), np.empty((num_channels, 0)))
+        # Last bins of every level, the first samples of the lag pairs
+        self.history = [empty] * num_levels
+        # Entries of the coarse bin not complete yet
+        self.pending = [empty] * num_levels
+        self.totals = np.zeros((num_levels, num_channels))
+        self.num_bins = 0
+
+    def add(self, bins, counts, end_bin):
+        # bins: sorted base bins of the new entries, counts: (channels, n), every
+        # bin before end_bin is final
+        entries = (
+            np.asarray(bins, dtype=np.int64),
+            np.asarray(counts, dtype=np.float64),
+        )
+        self.num_bins = end_bin
+        for level in range(self.num_levels):
+            end = end_bin >> level
+            entries = self.complete_entries(level, entries, end)
+            self.correlate_level(level, entries, end)
+            # Pairs of bins are summed by the next level
+            entries = (entries[0] >> 1, entries[1])
+
+    def complete_entries(self, level, entries, end):
+        # Returns the entries of the bins before end, the others wait for the next call
+        pending_bins, pending_counts = self.pending[level]
+        bins, counts = merge_entries(
+            np.concatenate((pending_bins, entries[0])),
+            np.concatenate((pending_counts, entries[1]), axis=1),
+        )
+        complete = np.searchsorted(bins, end)
+        self.pending[level] = (bins[complete:], counts[:, complete:])
+        return bins[:complete], counts[:, :complete]
+
+    def correlate_level(self, level, entries, end):
+        bins, counts = entries
+        if len(bins) == 0:
+            return
+        history_bins, history_counts = self.history[level]
+        x_bins = np.concatenate((history_bins, bins))
+        x_counts = np.concatenate((history_counts, counts), axis=1)
+        lags = self.level_lags[level]
+        num_pairs, num_lags = len(self.pairs), len(lags)
+        # Non empty bins t with bin - t within the level lags, for every new bin
+        first = np.searchsorted(x_bins, bins - lags[-1], side="left")
+        last = np.searchsorted(x_bins, bins - lags[0], side="right")
+        pair_a = self.pairs[:, 0:1]
+        pair_b = self.pairs[:, 1:2]
+        lag_offsets = np.arange(num_pairs)[:, None] * num_lags
+        for k in range(int(np.max(last - first))):
+            selected = np.flatnonzero(first + k < last)
+            partners = first[selected] + k
+            lag_indexes = bins[selected] - x_bins[partners] - lags[0]
+            weights = x_counts[pair_a, partners] * counts[pair_b, selected]
+            self.products[level] += np.bincount(
+                (lag_offsets + lag_indexes).ravel(),
+                weights=weights.ravel(),
+                minlength=num_pairs * num_lags,
+            ).reshape(num_pairs, num_lags)
+        self.totals[level] += counts.sum(axis=1)
+        keep = np.searchsorted(x_bins, end - self.lags_per_level)
+        self.history[level] = (x_bins[keep:], x_counts[:, keep:])
+
+    def result(self, bin_width_ns):
+        # Returns the lag times (ns) and the normalized correlation G(tau) of
+        # every pair
+        results = []
+        for i, (channel_a, channel_b) in enumerate(self.pairs):
+            taus = []
+            correlation = []
+            for level in range(self.num_levels):
+                # An incomplete last coarse bin is not counted
+                num_samples = self.num_bins >> level
+                mean_a = self.totals[level, channel_a] / max(num_samples, 1)
+                mean_b = self.totals[level, channel_b] / max(num_samples, 1)
+                pairs = num_samples - self.level_lags[level]
+                valid = pairs > 0
+                if mean_a == 0 or mean_b == 0 or not np.any(valid):
+                    continue
+                lags = self.level_lags[level][valid]
+                taus.append(lags * (2**level) * bin_width_ns)
+                correlation.append(
+                    (self.products[level][i][valid] / pairs[valid]) / (mean_a * mean_b)
+                )
+            if not taus:
+                results.append((np.empty(0), np.empty(0)))
+            else:
+                results.append((np.concatenate(taus), np.concatenate(correlation)))
+        return results
+
+
+def correlator_num_levels(bin_width_ns, max_lag_ns, lags_per_level=CORRELATOR_LAGS_PER_LEVEL):
+    num_levels = 1
+    while (lags_per_level - 1) * (2 ** (num_levels - 1)) * bin_width_ns < max_lag_ns:
+        num_levels += 1
+    return num_levels
+
+
+def iter_binned_counts(time_tagger_file, channels, bin_width_ns, progress_callback=None):
+    # Yields (bins, counts, end_bin): the sorted non empty macro time bins, their
+    # (len(channels), n) photon counts and the bin before which every bin is
+    # final. The last bin of a chunk is held back until the next chunk, photons
+    # older than the bins already yielded are dropped
+    positions = channel_positions(channels)
+    num_channels = len(channels)
+    next_bin = 0
+    pending_channel = np.empty(0, dtype=np.int64)
+    pending_bins = np.empty(0, dtype=np.int64)
+
+    def count_bins(channel, bins, end_bin):
+        nonlocal next_bin
+        unique_bins, inverse = np.unique(bins, return_inverse=True)
+        counts = np.bincount(
+            channel * len(unique_bins) + inverse.ravel(),
+            minlength=num_channels * len(unique_bins),
+        )
+        next_bin = max(next_bin, end_bin)
+        return unique_bins, counts.reshape(num_channels, len(unique_bins)), end_bin
+
+    for records in time_tagger_file.chunks(progress_callback=progress_callback):
+        channel = positions[records["event"]]
+        valid = channel >= 0
+        channel = np.concatenate((pending_channel, channel[valid]))
+        bins = np.concatenate(
+            (pending_bins, (records["macro"][valid] // bin_width_ns).astype(np.int64))
+        )
+        if np.any(bins[1:] < bins[:-1]):
+            order = np.argsort(bins, kind="stable")
+            channel, bins = channel[order], bins[order]
+        start = np.searchsorted(bins, next_bin)
+        channel, bins = channel[start:], bins[start:]
+        if len(bins) == 0:
+            continue
+        last_bin = int(bins[-1])
+        complete = np.searchsorted(bins, last_bin)
+        yield count_bins(channel[:complete], bins[:complete], last_bin)
+        pending_channel, pending_bins = channel[complete:], bins[complete:]
+    if len(pending_bins) > 0:
+        yield count_bins(pending_channel, pending_bins, int(pending_bins[-1]) + 1)
+
+
+def correlate_time_tagger(
+    time_tagger_file,
+    channel_pairs,
+    bin_width_ns=1000,
+    max_lag_ns=1_000_000_000,
+    progress_callback=None,
+):
+    # Auto (ch, ch) and cross (ch_a, ch_b) correlations of the photon streams,
+    # returns {(ch_a, ch_b): (taus_ns, G)}
+    channels = sorted({channel for pair in channel_pairs for channel in pair})
+    position = {channel: i for i, channel in enumerate(channels)}
+    num_levels = correlator_num_levels(bin_width_ns, max_lag_ns)
+    correlator = MultiTauCorrelator(
+        num_levels,
+        len(channels),
+        [(position[channel_a], position[channel_b]) for channel_a, channel_b in channel_pairs],
+    )
+    for bins, counts, end_bin in iter_binned_counts(
+        time_tagger_file, channels, bin_width_ns, progress_callback=progress_callback
+    ):
+        correlator.add(bins, counts, end_bin)
+    return dict(zip(channel_pairs, correlator.result(bin_width_ns)))
+
+
+def correlation_file_path(file_path, extension):
+    return f"{os.path.splitext(file_path)[0]}_correlation{extension}"
+
+
+def save_correlations(file_path, bin_width_ns, correlations):
+    # Writes <file>_correlation.npz and a readable <file>_correlation.json
+    arrays = {"bin_width_ns": np.array(bin_width_ns, dtype=np.float64)}
+    items = []
+    for (channel_a, channel_b), (taus, correlation) in correlations.items():
+        key = f"ch{channel_a + 1}_ch{channel_b + 1}"
+        arrays[f"{key}_tau_ns"] = taus
+        arrays[f"{key}_g"] = correlation
+        items.append(
+            {
+                "channels": [channel_a, channel_b],
+                "tau_ns": taus.tolist(),
+                "g": correlation.tolist(),
+            }
+        )
+    npz_file = correlation_file_path(file_path, ".npz")
+    np.savez_compressed(npz_file, **arrays)
+    json_file = correlation_file_path(file_path, ".json")
+    with open(json_file, "w") as f:
+        json.dump({"bin_width_ns": bin_width_ns, "correlations": items}, f)
+    return npz_file, json_file
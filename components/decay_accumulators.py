@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class DecayAccumulators:
+    # Preallocated uint64 decay sums per channel, updated in place. The arrays
+    # returned by add and add_batch are views of the sums that stay in sync
+    def __init__(self):
+        self.sums = {}
+
+    def get(self, channel, num_bins):
+        decay_sum = self.sums.get(channel)
+        if decay_sum is None or len(decay_sum) != num_bins:
+            decay_sum = np.zeros(num_bins, dtype=np.uint64)
+            self.sums[channel] = decay_sum
+        return decay_sum
+
+    @staticmethod
+    def as_counts(curves):
+        # Photon counts as uint64, a plain cast would silently wrap negative
+        # values and truncate fractional ones
+        curves = np.asarray(curves)
+        if curves.dtype.kind != "u":
+            if curves.dtype.kind not in "if":
+                raise ValueError("Decay curves must be numeric")
+            if np.any(curves < 0):
+                raise ValueError("Decay curves must not be negative")
+            if curves.dtype.kind == "f" and not np.all(np.mod(curves, 1) == 0):
+                raise ValueError("Decay curves must hold integer photon counts")
+        return curves.astype(np.uint64, copy=False)
+
+    def add(self, channel, curve):
+        curve = self.as_counts(curve)
+        decay_sum = self.get(channel, curve.shape[-1])
+        np.add(decay_sum, curve, out=decay_sum)
+        return decay_sum
+
+    def add_batch(self, channel, curves):
+        # curves: (n_packets, num_bins), summed with a single vectorized call
+        curves = self.as_counts(curves)
+        decay_sum = self.get(channel, curves.shape[-1])
+        decay_sum += np.sum(curves, axis=0, dtype=np.uint64)
+        return decay_sum
+
+    def clear(self):
+        # New arrays, views handed out before (e.g. to the fitting) are kept intact
+        self.sums = {}
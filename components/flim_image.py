@@ -0,0 +1,217 @@
+import os
+import numpy as np
+from components.time_tagger_file import (
+    FRAME_EVENT,
+    LINE_EVENT,
+    PIXEL_EVENT,
+    channel_positions,
+    get_marker_index,
+)
+
+FLIM_IMAGE_NUM_BINS = 64
+MAX_FLIM_IMAGE_BYTES = 2 * 1024 * 1024 * 1024
+
+
+class FlimFrameGrid:
+    # Row and column of the pixel markers of a frame. Rows start at L markers and
+    # pixels at P markers, a photon belongs to the last pixel marker before it if
+    # it arrives within the pixel dwell time
+    def __init__(self, line_times, pixel_times):
+        line_times = np.sort(line_times)
+        self.pixel_times = np.sort(pixel_times)
+        pixel_line = np.searchsorted(line_times, self.pixel_times, side="right") - 1
+        valid = pixel_line >= 0
+        self.height = self.width = 0
+        if not np.any(valid):
+            return
+        line_first_pixel = np.searchsorted(self.pixel_times, line_times, side="left")
+        pixel_x = (
+            np.arange(len(self.pixel_times))
+            - line_first_pixel[np.maximum(pixel_line, 0)]
+        )
+        self.pixel_y = np.where(valid, pixel_line, -1)
+        self.pixel_x = np.where(valid, pixel_x, -1)
+        self.height = int(self.pixel_y.max()) + 1
+        self.width = int(self.pixel_x.max()) + 1
+        # Photons after the last pixel of a line (flyback) are dropped
+        same_line = pixel_line[1:] == pixel_line[:-1]
+        pixel_steps = np.diff(self.pixel_times)[same_line]
+        self.dwell_time_ns = (
+            float(np.median(pixel_steps)) if len(pixel_steps) > 0 else np.inf
+        )
+
+    def locate(self, macro):
+        # Returns (valid, y, x) of the photons macro times
+        pixel = np.searchsorted(self.pixel_times, macro, side="right") - 1
+        valid = pixel >= 0
+        pixel = np.maximum(pixel, 0)
+        valid &= self.pixel_y[pixel] >= 0
+        valid &= macro - self.pixel_times[pixel] < self.dwell_time_ns
+        pixel = pixel[valid]
+        return valid, self.pixel_y[pixel], self.pixel_x[pixel]
+
+
+def frame_records(time_tagger_file, frame_offsets):
+    # (start_record, end_record) of every frame, from an F marker to the next one.
+    # Without F markers the whole file is a single frame
+    if len(frame_offsets) == 0:
+        return [(0, time_tagger_file.num_records)]
+    frame_offsets = np.sort(frame_offsets)
+    return [
+        time_tagger_file.marker_records(frame_offsets, i)
+        for i in range(len(frame_offsets))
+    ]
+
+
+def read_frame_grid(time_tagger_file, start_record, end_record):
+    # First pass over a frame, only its line and pixel markers are kept
+    line_times = []
+    pixel_times = []
+    for records in time_tagger_file.chunks(
+        start_record=start_record, end_record=end_record
+    ):
+        events = records["event"]
+        line_times.append(records["macro"][events == LINE_EVENT])
+        pixel_times.append(records["macro"][events == PIXEL_EVENT])
+    return FlimFrameGrid(
+        np.concatenate(line_times) if line_times else np.empty(0),
+        np.concatenate(pixel_times) if pixel_times else np.empty(0),
+    )
+
+
+def grow_images(images, height, width, axis=1):
+    # Pads the images, with height and width at axis and axis + 1, to a larger
+    # frame size
+    padding = [(0, 0)] * images.ndim
+    padding[axis] = (0, height - images.shape[axis])
+    padding[axis + 1] = (0, width - images.shape[axis + 1])
+    return np.pad(images, padding)
+
+
+def add_counts(out, indexes, weights=None):
+    # Adds the indexes counts (or weights) into the flat out array, only the
+    # touched span is histogrammed
+    if len(indexes) == 0:
+        return
+    low, high = int(indexes.min()), int(indexes.max())
+    counts = np.bincount(indexes - low, weights=weights, minlength=high - low + 1)
+    out[low : high + 1] += counts.astype(out.dtype)
+
+
+def reconstruct_flim_images(
+    time_tagger_file,
+    num_bins=FLIM_IMAGE_NUM_BINS,
+    micro_range=None,
+    harmonic=1,
+    channels=None,
+    progress_callback=None,
+):
+    # Per channel photon counts (frames, height, width), decays summed over the
+    # frames (height, width, num_bins) and phasor G/S images (height, width).
+    # Frames are processed one at a time, seeked through the F markers index:
+    # a first pass reads the frame line and pixel markers, a second one places
+    # its photons, so only one frame of markers is held in memory
+    channels = time_tagger_file.channels if channels is None else channels
+    if micro_range is None:
+        micro_range = (0.0, float(time_tagger_file.laser_period_ns))
+    if micro_range[1] <= micro_range[0]:
+        raise ValueError("Invalid micro time range")
+    frame_offsets = get_marker_index(
+        time_tagger_file, progress_callback, events=(FRAME_EVENT,)
+    )[FRAME_EVENT]
+    frames_records = frame_records(time_tagger_file, frame_offsets)
+    positions = channel_positions(channels)
+    num_channels = len(channels)
+    height = width = 0
+    last_frame = -1
+    intensity = np.zeros((num_channels, len(frames_records), 0, 0), dtype=np.uint32)
+    decays = np.zeros((num_channels, 0, 0, num_bins), dtype=np.uint32)
+    cos_sums = np.zeros((num_channels, 0, 0))
+    sin_sums = np.zeros((num_channels, 0, 0))
+    micro_min, micro_max = micro_range
+    omega = 2 * np.pi * harmonic / float(time_tagger_file.laser_period_ns)
+    for frame, (start_record, end_record) in enumerate(frames_records):
+        grid = read_frame_grid(time_tagger_file, start_record, end_record)
+        if grid.height == 0:
+            continue
+        last_frame = frame
+        if grid.height > height or grid.width > width:
+            height, width = max(height, grid.height), max(width, grid.width)
+            image_bytes = (
+                num_channels * height * width * (len(frames_records) * 4 + num_bins * 4 + 16)
+            )
+            if image_bytes > MAX_FLIM_IMAGE_BYTES:
+                raise ValueError("Image too large, reduce the decay bins")
+            intensity = grow_images(intensity, height, width, axis=2)
+            decays = grow_images(decays, height, width)
+            cos_sums = grow_images(cos_sums, height, width)
+            sin_sums = grow_images(sin_sums, height, width)
+        for records in time_tagger_file.chunks(
+            progress_callback=progress_callback,
+            start_record=start_record,
+            end_record=end_record,
+        ):
+            channel = positions[records["event"]]
+            photons = channel >= 0
+            if not np.any(photons):
+                continue
+            macro = records["macro"][photons]
+            micro = records["micro"][photons]
+            channel = channel[photons]
+            valid, y, x = grid.locate(macro)
+            micro, channel = micro[valid], channel[valid]
+            pixel = y * width + x
+            in_range = (micro >= micro_min) & (micro < micro_max)
+            bins = ((micro - micro_min) * (num_bins / (micro_max - micro_min))).astype(
+                np.int64
+            )
+            np.clip(bins, 0, num_bins - 1, out=bins)
+            phase = omega * micro
+            for i in range(num_channels):
+                selected = channel == i
+                add_counts(intensity[i, frame].reshape(-1), pixel[selected])
+                add_counts(cos_sums[i].reshape(-1), pixel[selected], np.cos(phase[selected]))
+                add_counts(sin_sums[i].reshape(-1), pixel[selected], np.sin(phase[selected]))
+                selected &= in_range
+                add_counts(
+                    decays[i].reshape(-1), pixel[selected] * num_bins + bins[selected]
+                )
+    if last_frame < 0:
+        raise ValueError("The file has no pixel markers inside a line")
+    # Trailing frames without pixels (an incomplete last frame) are dropped
+    intensity = intensity[:, : last_frame + 1]
+    bin_edges = np.linspace(micro_min, micro_max, num_bins + 1)
+    images = {
+        "bin_edges": bin_edges,
+        "harmonic": harmonic,
+        "intensity": {},
+        "decays": {},
+        "g": {},
+        "s": {},
+    }
+    for i, channel in enumerate(channels):
+        total = intensity[i].sum(axis=0, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            images["g"][channel] = cos_sums[i] / total
+            images["s"][channel] = sin_sums[i] / total
+        images["intensity"][channel] = intensity[i]
+        images["decays"][channel] = decays[i]
+    return images
+
+
+def flim_images_file_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}_flim.npz"
+
+
+def save_flim_images(file_path, images):
+    arrays = {
+        "bin_edges": images["bin_edges"],
+        "harmonic": np.array(images["harmonic"]),
+        "channels": np.array(list(images["intensity"].keys()), dtype=np.int64),
+    }
+    for key in ("intensity", "decays", "g", "s"):
+        for channel, image in images[key].items():
+            arrays[f"ch{channel + 1}_{key}"] = image
+    output_file = flim_images_file_path(file_path)
+    np.savez_compressed(output_file, **arrays)
+    return output_file
@@ -0,0 +1,61 @@
+import math
+import numpy as np
+
+# Extra room for packets arriving faster than one per bin width
+INTENSITY_TRACE_CAPACITY_FACTOR = 1.1
+INTENSITY_TRACE_CAPACITY_MARGIN = 16
+
+
+class IntensityTraceBuffer:
+    # Fixed capacity circular buffer of the (time, count) intensity samples.
+    # Every sample is written twice, at i and i + capacity, so the samples in
+    # the buffer are always a contiguous view that can be passed to setData
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.x = np.zeros(2 * capacity)
+        self.y = np.zeros(2 * capacity)
+        self.start = 0
+        self.size = 0
+
+    @staticmethod
+    def capacity_for(time_span_seconds, bin_width_micros):
+        samples = time_span_seconds * 1_000_000 / max(bin_width_micros, 1)
+        return (
+            math.ceil(samples * INTENSITY_TRACE_CAPACITY_FACTOR)
+            + INTENSITY_TRACE_CAPACITY_MARGIN
+        )
+
+    def extend(self, x, y):
+        # Only the newest samples fit, older ones are overwritten
+        x = np.asarray(x)[-self.capacity :]
+        y = np.asarray(y)[-self.capacity :]
+        end = (self.start + self.size) % self.capacity
+        first = min(len(x), self.capacity - end)
+        for position, samples in ((end, slice(0, first)), (0, slice(first, len(x)))):
+            count = samples.stop - samples.start
+            for buffer, values in ((self.x, x), (self.y, y)):
+                buffer[position : position + count] = values[samples]
+                buffer[position + self.capacity : position + self.capacity + count] = (
+                    values[samples]
+                )
+        self.size += len(x)
+        if self.size > self.capacity:
+            self.start = (self.start + self.size - self.capacity) % self.capacity
+            self.size = self.capacity
+
+    def trim(self, time_span):
+        # Drops the samples older than time_span before the newest one
+        if self.size <= 2:
+            return
+        x, _ = self.data()
+        dropped = int(np.searchsorted(x, x[-1] - time_span, side="left"))
+        self.start = (self.start + dropped) % self.capacity
+        self.size -= dropped
+
+    def data(self):
+        end = self.start + self.size
+        return self.x[self.start : end], self.y[self.start : end]
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
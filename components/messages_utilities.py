@@ -17,5 +17,7 @@ class MessagesUtilities:
             return ("Files successfully saved", "Data files and scripts saved successfully")
         elif "SavedPlotImage" in info_msg:
             return ("Image successfully saved", "Plot .png and .eps images saved successfully")
+        elif "ConvertedDataFile" in info_msg:
+            return ("File successfully converted", f"Data file converted and saved as {custom_content}")
         else:
             return (None, None)
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import numpy as np
+from components.spectroscopy_file import SPECTROSCOPY_READ_CHUNK_BYTES, read_metadata
+
+PHASORS_MAGIC_BYTES = b"SPF1"
+PHASORS_RECORD_DTYPE = np.dtype(
+    [
+        ("time_ns", "<u8"),
+        ("channel", "<u4"),
+        ("harmonic", "<u4"),
+        ("g", "<f8"),
+        ("s", "<f8"),
+    ]
+)
+
+
+class PhasorsData:
+    def __init__(self, time_ns, channel, harmonic, g, s):
+        # Group records by (channel, harmonic), a stable sort keeps the time order inside each group
+        keys = (channel.astype(np.uint64) << np.uint64(32)) | harmonic.astype(np.uint64)
+        order = np.argsort(keys, kind="stable")
+        self.time_ns = time_ns[order]
+        self.channel = channel[order]
+        self.harmonic = harmonic[order]
+        self.g = g[order]
+        self.s = s[order]
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self.groups = {
+            (int(key >> np.uint64(32)), int(key & np.uint64(0xFFFFFFFF))): (
+                int(start),
+                int(end),
+            )
+            for key, start, end in zip(unique_keys, starts, ends)
+        }
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(
+            records["time_ns"],
+            records["channel"],
+            records["harmonic"],
+            records["g"],
+            records["s"],
+        )
+
+    @property
+    def channels(self):
+        return sorted({channel for channel, _ in self.groups})
+
+    @property
+    def harmonics(self):
+        return sorted({harmonic for _, harmonic in self.groups})
+
+    def __len__(self):
+        return len(self.g)
+
+    def points(self, channel, harmonic):
+        if (channel, harmonic) not in self.groups:
+            return np.empty(0), np.empty(0)
+        start, end = self.groups[(channel, harmonic)]
+        return self.g[start:end], self.s[start:end]
+
+    def grouped(self):
+        data = {}
+        for channel, harmonic in self.groups:
+            data.setdefault(channel, {})[harmonic] = self.points(channel, harmonic)
+        return data
+
+
+def decode_phasors_records(buffer, channels=None):
+    # A truncated trailing record is discarded
+    num_records = len(buffer) // PHASORS_RECORD_DTYPE.itemsize
+    records = np.frombuffer(buffer, dtype=PHASORS_RECORD_DTYPE, count=num_records)
+    if channels is not None:
+        records = records[np.isin(records["channel"], channels)]
+    return PhasorsData.from_records(records)
+
+
+def read_phasors_records(
+    file,
+    channels=None,
+    chunk_bytes=SPECTROSCOPY_READ_CHUNK_BYTES,
+    progress_callback=None,
+):
+    # Reads the records region in chunks into a single preallocated buffer,
+    # progress_callback receives the file position after every chunk
+    buffer = bytearray(max(0, os.fstat(file.fileno()).st_size - file.tell()))
+    view = memoryview(buffer)
+    bytes_read = 0
+    while bytes_read < len(buffer):
+        chunk_read = file.readinto(view[bytes_read : bytes_read + chunk_bytes])
+        if not chunk_read:
+            break
+        bytes_read += chunk_read
+        if progress_callback is not None:
+            progress_callback(file.tell())
+    view.release()
+    return decode_phasors_records(memoryview(buffer)[:bytes_read], channels)
+
+
+def read_phasors_bin(file_path, channels=None, progress_callback=None):
+    with open(file_path, "rb") as f:
+        if f.read(4) != PHASORS_MAGIC_BYTES:
+            raise ValueError(f"Invalid file. {file_path} is not a valid Phasors file")
+        metadata = read_metadata(f)
+        phasors_data = read_phasors_records(
+            f, channels, progress_callback=progress_callback
+        )
+    return metadata, phasors_data
@@ -0,0 +1,282 @@
+import numpy as np
+
+PHASORS_POINTS_DTYPE = np.float32
+PHASORS_POINTS_INITIAL_CAPACITY = 1024
+# Histogram range around the universal semicircle, with room for the noise. The
+# bounds are multiples of 1/16, so the bins of every power of two resolution
+# nest and a coarse histogram can be summed from a finer one
+PHASORS_HISTOGRAM_G_RANGE = (-0.125, 1.125)
+PHASORS_HISTOGRAM_S_RANGE = (-0.125, 0.75)
+# Bins of the touched span per point below which a batch is histogrammed
+# with bincount rather than a scattered add
+PHASORS_HISTOGRAM_SPAN_RATIO = 16
+# Density view histograms kept up to date per store besides the quantized one
+PHASORS_MAX_DENSITY_HISTOGRAMS = 2
+
+
+PHASORS_DENSITY_MIN_BINS = 64
+PHASORS_DENSITY_MAX_BINS = 2048
+
+
+def phasors_density_bins(pixels_per_unit):
+    # Power of two close to the screen resolution, so zooming rebins rarely
+    bins = 2 ** int(np.ceil(np.log2(max(pixels_per_unit, 1))))
+    return int(min(max(bins, PHASORS_DENSITY_MIN_BINS), PHASORS_DENSITY_MAX_BINS))
+
+
+class PhasorsHistogram:
+    # 2D histogram of (g, s) points. bins is the number of pixels per unit, as
+    # the phasors resolution setting, only the configured range is allocated
+    def __init__(
+        self, bins, g_range=PHASORS_HISTOGRAM_G_RANGE, s_range=PHASORS_HISTOGRAM_S_RANGE
+    ):
+        self.bins = bins
+        self.g_range = g_range
+        self.s_range = s_range
+        self.shape = (
+            round((g_range[1] - g_range[0]) * bins),
+            round((s_range[1] - s_range[0]) * bins),
+        )
+        self.counts = np.zeros(self.shape, dtype=np.uint32)
+
+    def add(self, g_values, s_values):
+        valid = np.isfinite(g_values) & np.isfinite(s_values)
+        g_bins = np.floor((g_values[valid] - self.g_range[0]) * self.bins).astype(np.int64)
+        s_bins = np.floor((s_values[valid] - self.s_range[0]) * self.bins).astype(np.int64)
+        in_range = (
+            (g_bins >= 0)
+            & (g_bins < self.shape[0])
+            & (s_bins >= 0)
+            & (s_bins < self.shape[1])
+        )
+        if not np.any(in_range):
+            return
+        indexes = g_bins[in_range] * self.shape[1] + s_bins[in_range]
+        flat_counts = self.counts.reshape(-1)
+        low, high = int(indexes.min()), int(indexes.max())
+        # O(batch): a histogram of the touched span of bins, or a scattered
+        # add when the batch is small compared to the span
+        if len(indexes) * PHASORS_HISTOGRAM_SPAN_RATIO >= high - low + 1:
+            counts = np.bincount(indexes - low, minlength=high - low + 1)
+            flat_counts[low : high + 1] += counts.astype(np.uint32)
+        else:
+            np.add.at(flat_counts, indexes, 1)
+
+    def can_downsample(self, bins):
+        factor = self.bins // bins if bins > 0 else 0
+        return (
+            factor >= 1
+            and self.bins % bins == 0
+            and self.g_range == PHASORS_HISTOGRAM_G_RANGE
+            and self.s_range == PHASORS_HISTOGRAM_S_RANGE
+            and self.shape[0] % factor == 0
+            and self.shape[1] % factor == 0
+        )
+
+    def downsample(self, bins):
+        # Coarser histogram summed from blocks of bins, see can_downsample
+        factor = self.bins // bins
+        histogram = PhasorsHistogram(bins, self.g_range, self.s_range)
+        rows, cols = histogram.shape
+        histogram.counts[:] = self.counts.reshape(rows, factor, cols, factor).sum(
+            axis=(1, 3), dtype=np.uint32
+        )
+        return histogram
+
+
+class PhasorsStats:
+    # Running count, mean and covariance of the (g, s) points, batches are merged
+    # with the parallel form of Welford's algorithm. NaN points are only counted
+    def __init__(self):
+        self.count = 0
+        self.nan_count = 0
+        self.mean = np.zeros(2)
+        self.m2 = np.zeros((2, 2))
+
+    def add(self, g_values, s_values):
+        valid = ~(np.isnan(g_values) | np.isnan(s_values))
+        self.nan_count += int(len(valid) - np.count_nonzero(valid))
+        points = np.column_stack((g_values[valid], s_values[valid])).astype(np.float64)
+        batch_count = len(points)
+        if batch_count == 0:
+            return
+        batch_mean = points.mean(axis=0)
+        deviations = points - batch_mean
+        batch_m2 = deviations.T @ deviations
+        count = self.count + batch_count
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * (batch_count / count)
+        self.m2 = self.m2 + batch_m2 + np.outer(delta, delta) * (
+            self.count * batch_count / count
+        )
+        self.count = count
+
+    def covariance(self):
+        if self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+    def confidence_ellipse(self, confidence=0.95, num_points=100):
+        # (g, s) outline of the region holding the given fraction of a 2D
+        # normal distribution with the running mean and covariance
+        covariance = self.covariance()
+        if covariance is None or not np.all(np.isfinite(covariance)):
+            return None
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        radius = np.sqrt(-2 * np.log(1 - confidence))
+        angles = np.linspace(0, 2 * np.pi, num_points)
+        circle = np.column_stack((np.cos(angles), np.sin(angles)))
+        outline = (
+            circle * (radius * np.sqrt(np.maximum(eigenvalues, 0)))
+        ) @ eigenvectors.T + self.mean
+        return outline[:, 0], outline[:, 1]
+
+
+class PhasorsPoints:
+    # Growable (g, s) columns of a channel and harmonic. The capacity doubles
+    # when full, so appending a batch costs O(batch) amortized. The running
+    # statistics and the pinned (quantized view) histogram are updated with every
+    # batch, the density histograms catch up with the new points when they are
+    # requested. A store restored from a file summary decodes its points only
+    # when they are first needed
+    def __init__(self, capacity=PHASORS_POINTS_INITIAL_CAPACITY, histogram_bins=None):
+        self.g = np.empty(capacity, dtype=PHASORS_POINTS_DTYPE)
+        self.s = np.empty(capacity, dtype=PHASORS_POINTS_DTYPE)
+        self.size = 0
+        self.stats = PhasorsStats()
+        self.histograms = {}
+        # Number of stored points counted by every histogram
+        self.histogram_sizes = {}
+        # Resolution of the quantized view, its histogram is never evicted
+        self.pinned_bins = histogram_bins
+        if histogram_bins is not None:
+            self.histograms[histogram_bins] = PhasorsHistogram(histogram_bins)
+            self.histogram_sizes[histogram_bins] = 0
+        self.summary_histogram = None
+        self.loader = None
+        self.pending_size = 0
+
+    def __len__(self):
+        return self.size + self.pending_size
+
+    def set_summary(self, stats, histogram, loader):
+        # Points known by their statistics and a fine histogram only, loader()
+        # returns their (g, s) values from memory, None when they were not
+        # decoded. Coarser histograms are summed from the fine one
+        self.clear()
+        self.stats = stats
+        self.summary_histogram = histogram
+        self.loader = loader
+        self.pending_size = stats.count + stats.nan_count
+        self.histograms = {
+            bins: histogram.downsample(bins)
+            for bins in self.histograms
+            if histogram.can_downsample(bins)
+        }
+        self.histogram_sizes = {bins: 0 for bins in self.histograms}
+
+    def is_loaded(self):
+        return self.pending_size == 0
+
+    def has_points(self):
+        # False for a summary whose points were not decoded, values() is empty
+        return self.is_loaded() or self.loader is not None
+
+    def load(self):
+        # Copies the points of a summary, the statistics and the histograms
+        # already count them
+        if self.loader is None:
+            return
+        g_values, s_values = self.loader()
+        self.loader = None
+        self.pending_size = 0
+        count = len(g_values)
+        self.reserve(count)
+        self.g[:count] = g_values
+        self.s[:count] = s_values
+        self.size = count
+        self.histogram_sizes = {bins: count for bins in self.histograms}
+
+    def density_bins(self, bins):
+        # A resolution finer than the summary histogram would decode the points
+        if not self.is_loaded() and self.summary_histogram is not None:
+            return min(bins, self.summary_histogram.bins)
+        return bins
+
+    def reserve(self, size):
+        if size <= len(self.g):
+            return
+        capacity = max(size, 2 * len(self.g))
+        for name in ("g", "s"):
+            grown = np.empty(capacity, dtype=PHASORS_POINTS_DTYPE)
+            grown[: self.size] = getattr(self, name)[: self.size]
+            setattr(self, name, grown)
+
+    def append(self, g_values, s_values):
+        self.load()
+        count = len(g_values)
+        self.reserve(self.size + count)
+        self.g[self.size : self.size + count] = g_values
+        self.s[self.size : self.size + count] = s_values
+        g_values = self.g[self.size : self.size + count]
+        s_values = self.s[self.size : self.size + count]
+        self.stats.add(g_values, s_values)
+        if self.summary_histogram is not None:
+            self.summary_histogram.add(g_values, s_values)
+        self.size += count
+        if self.pinned_bins in self.histograms:
+            self.update_histogram(self.pinned_bins)
+
+    def update_histogram(self, bins):
+        # Adds the points stored since the histogram was last updated
+        counted = self.histogram_sizes[bins]
+        if counted < self.size:
+            self.histograms[bins].add(
+                self.g[counted : self.size], self.s[counted : self.size]
+            )
+            self.histogram_sizes[bins] = self.size
+
+    def append_points(self, points):
+        # points: (n, 2) array or sequence of (g, s) pairs
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.append(points[:, 0], points[:, 1])
+
+    def values(self):
+        # Views of the stored points, valid until the next append
+        self.load()
+        return self.g[: self.size], self.s[: self.size]
+
+    def get_histogram(self, bins, pinned=False):
+        # Built from the stored points only for a new resolution. The pinned
+        # (quantized view) histogram is kept, the least recently used density
+        # histograms are dropped
+        if pinned:
+            self.pinned_bins = bins
+        if bins in self.histograms:
+            # Most recently used last
+            self.histograms[bins] = self.histograms.pop(bins)
+            self.update_histogram(bins)
+        elif self.summary_histogram is not None and self.summary_histogram.can_downsample(
+            bins
+        ):
+            self.histograms[bins] = self.summary_histogram.downsample(bins)
+            self.histogram_sizes[bins] = self.size
+        else:
+            histogram = PhasorsHistogram(bins)
+            histogram.add(*self.values())
+            self.histograms[bins] = histogram
+            self.histogram_sizes[bins] = self.size
+        density_bins = [b for b in self.histograms if b != self.pinned_bins]
+        for b in density_bins[: max(len(density_bins) - PHASORS_MAX_DENSITY_HISTOGRAMS, 0)]:
+            del self.histograms[b]
+            del self.histogram_sizes[b]
+        return self.histograms[bins]
+
+    def clear(self):
+        self.size = 0
+        self.summary_histogram = None
+        self.loader = None
+        self.pending_size = 0
+        self.stats = PhasorsStats()
+        self.histograms = {bins: PhasorsHistogram(bins) for bins in self.histograms}
+        self.histogram_sizes = {bins: 0 for bins in self.histograms}
@@ -2,16 +2,23 @@ from functools import partial
 import json
 import os
 import re
-import struct
 from matplotlib import pyplot as plt
 import numpy as np
 from components.box_message import BoxMessage
+from components.columnar_file import (
+    convert_bin_file,
+    find_converted_file,
+    read_phasors_file,
+    sum_spectroscopy_file,
+)
 from components.gui_styles import GUIStyles
 from components.helpers import extract_channel_from_label, ns_to_mhz
 from components.input_text_control import InputTextControl
 from components.layout_utilities import clear_layout
 from components.messages_utilities import MessagesUtilities
+from components.progress_bar import ProgressBar
 from components.resource_path import resource_path
+from components.summary_cache import SummaryCache
 from fit_decay_curve import convert_json_serializable_item_into_np_fitting_result
 from settings import *
 from PyQt6.QtWidgets import (
@@ -36,37 +43,87 @@ project_root = os.path.abspath(os.path.join(current_path))
 
 class ReadData:
     @staticmethod
-    def read_bin_data(window, app, tab_selected, file_type):
-        active_tab = ReadData.get_data_type(tab_selected)
+    def read_bin_data(window, app, tab_selected, file_type, signals):
+        # Selects the file on the GUI thread and decodes it in a background task,
+        # signals.success delivers the decoded result to pass to store_bin_data
         file_info = {
             "spectroscopy": (b"SP01", "Spectroscopy", ReadData.read_spectroscopy_data),
-            "phasors": (b"SPF1", "Phasors", ReadData.read_phasors_data),
+            "phasors": (
+                b"SPF1",
+                "Phasors",
+                partial(
+                    ReadData.read_phasors_data,
+                    lod_threshold=int(
+                        app.settings.value(
+                            SETTINGS_PHASORS_LOD_THRESHOLD, DEFAULT_PHASORS_LOD_THRESHOLD
+                        )
+                    ),
+                ),
+            ),
         }
         if file_type not in file_info:
-            return
-        result = ReadData.read_bin(window, app, *file_info[file_type], active_tab)
-        if not result:
-            return
+            return None
+        magic_bytes, file_label, read_data_cb = file_info[file_type]
+        file_name = ReadData.read_bin(window, magic_bytes, file_label)
+        if not file_name:
+            return None
+        signals.error.connect(
+            lambda error: ReadData.show_warning_message(
+                "Error reading file", f"Error reading {file_label} file"
+            )
+        )
+        # Progress refers to the converted file when the readers prefer it
+        total_bytes = os.path.getsize(find_converted_file(file_name) or file_name)
+        task = ReadBinTask(file_name, read_data_cb, signals, total_bytes)
+        QThreadPool.globalInstance().start(task)
+        return task
+
+    @staticmethod
+    def convert_bin_data(file_name, signals):
+        def show_success_message(output_file):
+            info_title, info_msg = MessagesUtilities.info_handler(
+                "ConvertedDataFile", output_file
+            )
+            BoxMessage.setup(
+                info_title,
+                info_msg,
+                QMessageBox.Icon.Information,
+                GUIStyles.set_msg_box_style(),
+            )
+
+        signals.success.connect(show_success_message)
+        signals.error.connect(
+            lambda error: ReadData.show_warning_message(
+                "Error converting file", f"Error converting file: {error}"
+            )
+        )
+        task = ReadBinTask(file_name, convert_bin_file, signals)
+        QThreadPool.globalInstance().start(task)
+        return task
+
+    @staticmethod
+    def store_bin_data(app, active_tab, result):
         file_name, file_type, *data, metadata = result
         app.reader_data[active_tab]["plots"] = []
         app.reader_data[active_tab]["metadata"] = metadata
         app.reader_data[active_tab]["files"][file_type] = file_name
         if file_type == "spectroscopy":
-            times, channels_curves = data
+            times, channels_decays = data
             if active_tab == "spectroscopy":
                 app.reader_data[active_tab]["data"] = {
                     "times": times,
-                    "channels_curves": channels_curves,
+                    "channels_decays": channels_decays,
                 }
             if active_tab == "phasors" or active_tab == "fitting":
                 app.reader_data[active_tab]["spectroscopy_metadata"] = metadata
                 app.reader_data[active_tab]["data"]["spectroscopy_data"] = {
                     "times": times,
-                    "channels_curves": channels_curves,
+                    "channels_decays": channels_decays,
                 }
         elif file_type == "phasors":
-            phasors_data = data[0]
+            phasors_data, phasors_summary = data
             app.reader_data[active_tab]["data"]["phasors_data"] = phasors_data
+            app.reader_data[active_tab]["data"]["phasors_summary"] = phasors_summary
             app.reader_data[active_tab]["phasors_metadata"] = metadata
 
     
@@ -186,30 +243,29 @@ class ReadData:
         channels = metadata["channels"] if "channels" in metadata else []
         if (
             "times" in spectroscopy_data
-            and "channels_curves" in spectroscopy_data
+            and "channels_decays" in spectroscopy_data
             and not (metadata == {})
         ):
             ReadData.plot_spectroscopy_data(
                 app,
                 spectroscopy_data["times"],
-                spectroscopy_data["channels_curves"],
+                spectroscopy_data["channels_decays"],
                 laser_period_ns,
                 channels,
             )
         if data_type == "phasors":
-            phasors_data = app.reader_data[data_type]["data"]["phasors_data"]
+            phasors_summary = app.reader_data[data_type]["data"]["phasors_summary"]
             if not (metadata == {}):
-                ReadData.plot_phasors_data(app, phasors_data, metadata["harmonics"])
+                ReadData.plot_phasors_data(app, phasors_summary, metadata["harmonics"])
 
     @staticmethod
     def plot_spectroscopy_data(
-        app, times, channels_curves, laser_period_ns, metadata_channels
+        app, times, channels_decays, laser_period_ns, metadata_channels
     ):
         num_bins = 256
         x_values = np.linspace(0, laser_period_ns, num_bins) / 1_000
-        for channel, curves in channels_curves.items():
+        for channel, y_values in channels_decays.items():
             if metadata_channels[channel] in app.plots_to_show:
-                y_values = np.sum(curves, axis=0)
                 if app.tab_selected != TAB_PHASORS:
                     app.cached_decay_values[app.tab_selected][
                         metadata_channels[channel]
@@ -222,7 +278,7 @@ class ReadData:
     def get_spectroscopy_data_to_fit(app):
         spectroscopy_data = app.reader_data["fitting"]["data"]["spectroscopy_data"]
         metadata = app.reader_data["fitting"]["metadata"]
-        channels_curves = spectroscopy_data["channels_curves"]
+        channels_decays = spectroscopy_data["channels_decays"]
         channels = metadata["channels"]
         laser_period_ns = (
             metadata["laser_period_ns"]
@@ -232,9 +288,8 @@ class ReadData:
         data = []
         num_bins = 256
         x_values = np.linspace(0, laser_period_ns, num_bins)
-        for channel, curves in channels_curves.items():
+        for channel, y_values in channels_decays.items():
             if channels[channel] in app.plots_to_show:
-                y_values = np.sum(curves, axis=0)
                 if app.tab_selected != TAB_PHASORS:
                     app.cached_decay_values[app.tab_selected][
                         channels[channel]
@@ -251,7 +306,9 @@ class ReadData:
         return data        
 
     @staticmethod
-    def plot_phasors_data(app, data, harmonics):
+    def plot_phasors_data(app, summary, harmonics):
+        # The points stores are restored from the file summary (statistics and
+        # histograms), the points are decoded only if a scatter plot is drawn
         laser_period_ns = ReadData.get_phasors_laser_period_ns(app)
         app.all_phasors_points = app.get_empty_phasors_points()
         app.control_inputs[HARMONIC_SELECTOR].setCurrentIndex(0)
@@ -259,12 +316,32 @@ class ReadData:
         if harmonics_length > 1:
             app.harmonic_selector_shown = True
             app.show_harmonic_selector(harmonics)
-        for channel, channel_data in data.items():
-            if channel in app.plots_to_show:
-                for harmonic, values in channel_data.items():
+        summary_groups = SummaryCache.phasors_summary_groups(summary) if summary else None
+        if summary_groups is not None:
+            for (channel, harmonic), (stats, histogram) in summary_groups.items():
+                if channel in app.plots_to_show:
+                    app.all_phasors_points[channel][harmonic].set_summary(
+                        stats,
+                        histogram,
+                        (
+                            partial(ReadData.get_phasors_points, app, channel, harmonic)
+                            if ReadData.get_phasors_data(app) is not None
+                            else None
+                        ),
+                    )
                     if harmonic == 1:
-                        app.draw_points_in_phasors(channel, harmonic, values)
-                    app.all_phasors_points[channel][harmonic].extend(values)
+                        app.draw_points_in_phasors(channel, harmonic)
+        else:
+            data = ReadData.get_phasors_data(app)
+            phasors_groups = data.grouped() if data else {}
+            for channel, channel_data in phasors_groups.items():
+                if channel in app.plots_to_show:
+                    for harmonic, (g_values, s_values) in channel_data.items():
+                        app.all_phasors_points[channel][harmonic].append(
+                            g_values, s_values
+                        )
+                        if harmonic == 1:
+                            app.draw_points_in_phasors(channel, harmonic)
         if app.quantized_phasors:
             app.quantize_phasors(
                 app.phasors_harmonic_selected,
@@ -311,7 +388,7 @@ class ReadData:
         )
         
     @staticmethod
-    def read_bin(window, app, magic_bytes, file_type, read_data_cb, tab_selected, filter_string = None):
+    def read_bin(window, magic_bytes, file_type, filter_string = None):
         dialog = QFileDialog()
         dialog.setAcceptMode(QFileDialog.AcceptMode.AcceptOpen)
         if filter_string:
@@ -342,7 +419,7 @@ class ReadData:
                         f"Invalid file. The file is not a valid {file_type} file.",
                     )
                     return None
-                return read_data_cb(f, file_name, file_type, tab_selected, app)
+                return file_name
         except Exception:
             ReadData.show_warning_message(
                 "Error reading file", f"Error reading {file_type} file"
@@ -350,59 +427,88 @@ class ReadData:
             return None
 
     @staticmethod
-    def read_spectroscopy_data(file, file_name, file_type, tab_selected, app):
-        try:
-            json_length = struct.unpack("I", file.read(4))[0]
-            metadata = json.loads(file.read(json_length).decode("utf-8"))
-            channel_curves = {i: [] for i in range(len(metadata["channels"]))}
-            times = []
-            number_of_channels = len(metadata["channels"])
-            while True:
-                data = file.read(8)
-                if not data:
-                    break
-                time = struct.unpack("d", data)[0]
-                times.append(time / 1_000_000_000)
-                for i in range(number_of_channels):
-                    data = file.read(4 * 256)
-                    if len(data) < 4 * 256:
-                        return times, channel_curves
-                    channel_curves[i].append(np.array(struct.unpack("I" * 256, data)))
-            return file_name, "spectroscopy", times, channel_curves, metadata
-        except Exception as e:
-            ReadData.show_warning_message(
-                "Error reading file", "Error reading Spectroscopy file"
+    def read_spectroscopy_data(file_name, progress_callback=None):
+        # Runs in a ReadBinTask, errors are reported through its signals
+        summary = SummaryCache.load(file_name)
+        if summary is None:
+            metadata, times, decays = sum_spectroscopy_file(file_name, progress_callback)
+            summary = SummaryCache.spectroscopy_summary(metadata, times, decays)
+            SummaryCache.save(file_name, summary)
+        else:
+            # The records are evenly spaced, only the count and the last time are shown
+            times = np.linspace(*summary["time_range"], int(summary["num_records"]))
+        channels_decays = {i: decay for i, decay in enumerate(summary["decays"])}
+        return (
+            file_name,
+            "spectroscopy",
+            times,
+            channels_decays,
+            summary["metadata"],
+        )
+
+    @staticmethod
+    def read_phasors_data(
+        file_name, progress_callback=None, lod_threshold=DEFAULT_PHASORS_LOD_THRESHOLD
+    ):
+        # Runs in a ReadBinTask, errors are reported through its signals. With a
+        # cached summary the points are decoded only if a group is small enough
+        # to be drawn as a scatter plot, the others are drawn from the histograms
+        summary = SummaryCache.load(file_name)
+        if summary is not None and "histograms" in summary:
+            num_points = summary["counts"] + summary["nan_counts"]
+            if not np.any(num_points <= lod_threshold):
+                return file_name, "phasors", None, summary, summary["metadata"]
+            _, phasors_data = read_phasors_file(
+                file_name, progress_callback=progress_callback
             )
-            return None
+            return file_name, "phasors", phasors_data, summary, summary["metadata"]
+        metadata, phasors_data = read_phasors_file(
+            file_name, progress_callback=progress_callback
+        )
+        summary = SummaryCache.phasors_summary(metadata, phasors_data)
+        SummaryCache.save(file_name, summary)
+        return file_name, "phasors", phasors_data, summary, metadata
 
     @staticmethod
-    def read_phasors_data(file, file_name, file_type, tab_selected, app):
-        phasors_data = {}
-        try:
-            json_length = struct.unpack("I", file.read(4))[0]
-            metadata = json.loads(file.read(json_length).decode("utf-8"))
-            while True:
-                bytes_read = file.read(32)
-                if not bytes_read:
-                    break
-                try:
-                    time_ns, channel_name, harmonic_name, g, s = struct.unpack(
-                        "QIIdd", bytes_read
-                    )
-                except struct.error:
-                    ReadData.show_warning_message(
-                        "Error unpacking file", "Error unpacking Phasors file data"
-                    )
-                    break
-                phasors_data.setdefault(channel_name, {}).setdefault(
-                    harmonic_name, []
-                ).append((g, s))
-            return file_name, "phasors", phasors_data, metadata
-        except Exception:
-            ReadData.show_warning_message(
+    def get_phasors_data(app):
+        # None when the file was opened from its cached summary without the points
+        return app.reader_data["phasors"]["data"]["phasors_data"]
+
+    @staticmethod
+    def load_phasors_data(app, on_loaded):
+        # Decodes the points not read with the summary in a ReadBinTask,
+        # on_loaded runs on the GUI thread once they are stored
+        data = app.reader_data["phasors"]["data"]
+        if data["phasors_data"] is not None:
+            on_loaded()
+            return None
+        file_name = app.reader_data["phasors"]["files"]["phasors"]
+
+        def store_phasors_data(result):
+            _, data["phasors_data"] = result
+            on_loaded()
+
+        signals = ReadBinWorkerSignals()
+        signals.success.connect(store_phasors_data)
+        signals.error.connect(
+            lambda error: ReadData.show_warning_message(
                 "Error reading file", "Error reading Phasors file"
             )
-            return None
+        )
+        task = ReadBinTask(
+            file_name,
+            lambda file_name, progress_callback: read_phasors_file(
+                file_name, progress_callback=progress_callback
+            ),
+            signals,
+            os.path.getsize(find_converted_file(file_name) or file_name),
+        )
+        QThreadPool.globalInstance().start(task)
+        return task
+
+    @staticmethod
+    def get_phasors_points(app, channel, harmonic):
+        return ReadData.get_phasors_data(app).points(channel, harmonic)
 
     @staticmethod
     def save_plot_image(plot):
@@ -470,17 +576,17 @@ class ReadData:
     @staticmethod
     def prepare_spectroscopy_data_for_export_img(app):
         metadata = app.reader_data["spectroscopy"]["metadata"]
-        channels_curves = app.reader_data["spectroscopy"]["data"]["channels_curves"]
+        channels_decays = app.reader_data["spectroscopy"]["data"]["channels_decays"]
         times = app.reader_data["spectroscopy"]["data"]["times"]
-        return channels_curves, times, metadata
+        return channels_decays, times, metadata
 
     @staticmethod
     def prepare_phasors_data_for_export_img(app):
-        phasors_data = app.reader_data["phasors"]["data"]["phasors_data"]
+        phasors_data = ReadData.get_phasors_data(app)
         laser_period = app.reader_data["phasors"]["metadata"]["laser_period_ns"]
         active_channels = app.reader_data["phasors"]["metadata"]["channels"]
-        spectroscopy_curves = app.reader_data["phasors"]["data"]["spectroscopy_data"][
-            "channels_curves"
+        spectroscopy_decays = app.reader_data["phasors"]["data"]["spectroscopy_data"][
+            "channels_decays"
         ]
         spectroscopy_times = app.reader_data["phasors"]["data"]["spectroscopy_data"][
             "times"
@@ -490,7 +596,7 @@ class ReadData:
             laser_period,
             active_channels,
             spectroscopy_times,
-            spectroscopy_curves,
+            spectroscopy_decays,
         )
 
 
@@ -507,6 +613,7 @@ class ReadDataControls:
         app.control_inputs["bin_metadata_button"].setVisible(bin_metadata_btn_visible)
         app.control_inputs["start_button"].setVisible(not read_mode)
         app.control_inputs["read_bin_button"].setVisible(read_mode)
+        app.control_inputs["time_tagger_reader_button"].setVisible(read_mode)
         app.control_inputs[EXPORT_PLOT_IMG_BUTTON].setVisible(
             bin_metadata_btn_visible and app.tab_selected != TAB_FITTING
         ) 
@@ -578,6 +685,7 @@ class ReaderPopup(QWidget):
         self.layouts = {}
         self.channels_checkboxes = []
         self.channels_checkbox_first_toggle = True
+        self.loading_task = None
         self.data_type = ReadData.get_data_type(self.tab_selected)
         self.setWindowTitle("Read data")
         TitlebarIcon.setup(self)
@@ -641,14 +749,46 @@ class ReaderPopup(QWidget):
             load_file_btn.clicked.connect(
                 partial(self.on_load_file_btn_clicked, file_type)
             )
+            self.widgets[f"load_{file_type}_btn"] = load_file_btn
             control_row.addWidget(input)
             control_row.addWidget(load_file_btn)
+            if file_extension == ".bin":
+                # Converts the .bin into a columnar .parquet preferred by the readers
+                convert_btn = QPushButton("CONVERT")
+                convert_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+                GUIStyles.set_start_btn_style(convert_btn)
+                convert_btn.setFixedHeight(36)
+                convert_btn.setToolTip("Convert to a compressed columnar .parquet file")
+                convert_btn.setEnabled(len(file_path.strip()) > 0)
+                convert_btn.clicked.connect(
+                    partial(self.on_convert_file_btn_clicked, file_type)
+                )
+                self.widgets[f"convert_{file_type}_btn"] = convert_btn
+                control_row.addWidget(convert_btn)
             v_box.addWidget(input_desc)
             v_box.addSpacing(10)
             v_box.addLayout(control_row)
             v_box.addSpacing(10)
+        v_box.addLayout(self.init_loading_progress_ui())
         return v_box
 
+    def init_loading_progress_ui(self):
+        loading_row = QHBoxLayout()
+        progress_bar = ProgressBar(
+            label_text="Loading file...", visible=False, color=PALETTE_BLUE_1
+        )
+        self.widgets["loading_progress_bar"] = progress_bar
+        cancel_btn = QPushButton("CANCEL")
+        cancel_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(cancel_btn)
+        cancel_btn.setFixedHeight(36)
+        cancel_btn.setVisible(False)
+        cancel_btn.clicked.connect(self.on_cancel_loading_btn_clicked)
+        self.widgets["cancel_loading_btn"] = cancel_btn
+        loading_row.addWidget(progress_bar, 1)
+        loading_row.addWidget(cancel_btn)
+        return loading_row
+
     def init_channels_layout(self):
         self.channels_checkboxes.clear()
         file_metadata = self.app.reader_data[self.data_type]["metadata"]
@@ -776,13 +916,77 @@ class ReaderPopup(QWidget):
             self.app.generate_plots()
             self.app.toggle_intensities_widgets_visibility()
         self.app.reader_data[self.data_type]["files"][file_type] = text
+        if f"convert_{file_type}_btn" in self.widgets:
+            self.widgets[f"convert_{file_type}_btn"].setEnabled(len(text.strip()) > 0)
         
 
     def on_load_file_btn_clicked(self, file_type):
         if file_type == "fitting":
             ReadData.read_fitting_data(self, self.app)
-        else:
-            ReadData.read_bin_data(self, self.app, self.tab_selected, file_type)
+            self.on_file_loaded(file_type)
+            return
+        signals = ReadBinWorkerSignals()
+        signals.progress.connect(self.on_loading_progress)
+        signals.success.connect(
+            lambda result: self.on_loading_finished(file_type, result)
+        )
+        signals.error.connect(lambda _: self.on_loading_finished(file_type, None))
+        signals.cancelled.connect(lambda: self.on_loading_finished(file_type, None))
+        task = ReadData.read_bin_data(
+            self, self.app, self.tab_selected, file_type, signals
+        )
+        if task is not None:
+            self.loading_task = task
+            self.set_loading_state(True)
+
+    def set_loading_state(self, loading):
+        progress_bar = self.widgets["loading_progress_bar"]
+        progress_bar.update_progress(0, 1, "Loading file...")
+        progress_bar.set_visible(loading)
+        self.widgets["cancel_loading_btn"].setVisible(loading)
+        files = self.app.reader_data[self.data_type]["files"]
+        for key, widget in self.widgets.items():
+            if key.startswith("load_"):
+                widget.setEnabled(not loading)
+            if key.startswith("convert_"):
+                file_type = key[len("convert_") : -len("_btn")]
+                widget.setEnabled(not loading and len(files[file_type].strip()) > 0)
+        if "plot_btn" in self.widgets:
+            plots_to_show = self.app.reader_data[self.data_type]["plots"]
+            self.widgets["plot_btn"].setEnabled(not loading and len(plots_to_show) > 0)
+
+    def on_loading_progress(self, bytes_read, total_bytes):
+        self.widgets["loading_progress_bar"].update_progress(
+            bytes_read,
+            max(total_bytes, 1),
+            f"Loading file... {bytes_read / 1_048_576:.1f}/{total_bytes / 1_048_576:.1f} MB",
+        )
+
+    def on_convert_file_btn_clicked(self, file_type):
+        file_name = self.app.reader_data[self.data_type]["files"][file_type]
+        if len(file_name.strip()) == 0:
+            return
+        signals = ReadBinWorkerSignals()
+        signals.progress.connect(self.on_loading_progress)
+        signals.success.connect(lambda _: self.on_loading_finished(file_type, None))
+        signals.error.connect(lambda _: self.on_loading_finished(file_type, None))
+        signals.cancelled.connect(lambda: self.on_loading_finished(file_type, None))
+        self.loading_task = ReadData.convert_bin_data(file_name, signals)
+        self.set_loading_state(True)
+
+    def on_cancel_loading_btn_clicked(self):
+        if self.loading_task is not None:
+            self.loading_task.cancel()
+
+    def on_loading_finished(self, file_type, result):
+        self.loading_task = None
+        if result is not None:
+            ReadData.store_bin_data(self.app, self.data_type, result)
+        self.set_loading_state(False)
+        if result is not None:
+            self.on_file_loaded(file_type)
+
+    def on_file_loaded(self, file_type):
         file_name = self.app.reader_data[self.data_type]["files"][file_type]
         if file_name is not None and len(file_name) > 0:
             bin_metadata_btn_visible = ReadDataControls.read_bin_metadata_enabled(
@@ -840,6 +1044,11 @@ class ReaderPopup(QWidget):
             ReadData.plot_data(self.app)
         self.close()
 
+    def closeEvent(self, event):
+        if self.loading_task is not None:
+            self.loading_task.cancel()
+        super().closeEvent(event)
+
     def center_window(self):
         self.setMinimumWidth(500)
         window_geometry = self.frameGeometry()
@@ -976,3 +1185,48 @@ class SavePlotTask(QRunnable):
         except Exception as e:
             plt.close(self.plot)
             self.signals.error.emit(str(e))
+
+
+class ReadBinCancelledError(Exception):
+    pass
+
+
+class ReadBinWorkerSignals(QObject):
+    # object instead of int: file sizes can exceed the 32-bit range
+    progress = pyqtSignal(object, object)
+    success = pyqtSignal(object)
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class ReadBinTask(QRunnable):
+    def __init__(self, file_name, read_data_cb, signals, total_bytes=None):
+        super().__init__()
+        self.file_name = file_name
+        self.read_data_cb = read_data_cb
+        self.signals = signals
+        self.total_bytes = (
+            total_bytes if total_bytes is not None else os.path.getsize(file_name)
+        )
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def on_progress(self, bytes_read):
+        # Called by the decoders after every chunk, also the cancellation point
+        if self.is_cancelled:
+            raise ReadBinCancelledError()
+        self.signals.progress.emit(bytes_read, self.total_bytes)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.read_data_cb(self.file_name, self.on_progress)
+            if self.is_cancelled:
+                raise ReadBinCancelledError()
+            self.signals.success.emit(result)
+        except ReadBinCancelledError:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(str(e))
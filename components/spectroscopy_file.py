@@ -0,0 +1,180 @@
+import bisect
+import json
+import os
+import struct
+import numpy as np
+
+SPECTROSCOPY_MAGIC_BYTES = b"SP01"
+SPECTROSCOPY_NUM_BINS = 256
+SPECTROSCOPY_READ_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def read_metadata(file):
+    # Reads the JSON header that follows the 4 magic bytes
+    (json_length,) = struct.unpack("<I", file.read(4))
+    metadata = json.loads(file.read(json_length).decode("utf-8"))
+    return metadata
+
+
+def spectroscopy_record_dtype(num_channels):
+    # Each record: 8 bytes timestamp (ns) + 256 uint32 counts for every active channel
+    return np.dtype(
+        [
+            ("time", "<f8"),
+            ("curves", "<u4", (num_channels, SPECTROSCOPY_NUM_BINS)),
+        ]
+    )
+
+
+def decode_spectroscopy_records(buffer, num_channels):
+    record_dtype = spectroscopy_record_dtype(num_channels)
+    # A truncated trailing record (acquisition interrupted) is discarded
+    num_records = len(buffer) // record_dtype.itemsize
+    records = np.frombuffer(buffer, dtype=record_dtype, count=num_records)
+    times = records["time"] / 1_000_000_000
+    return times, records["curves"]
+
+
+def iter_spectroscopy_chunks(
+    file,
+    num_channels,
+    chunk_bytes=SPECTROSCOPY_READ_CHUNK_BYTES,
+    progress_callback=None,
+):
+    # Yields the records read in fixed-size chunks. The yielded arrays share a
+    # single buffer that is overwritten by the next read, so they must not be kept.
+    # progress_callback receives the file position after every chunk
+    record_dtype = spectroscopy_record_dtype(num_channels)
+    chunk_records = max(1, chunk_bytes // record_dtype.itemsize)
+    buffer = bytearray(chunk_records * record_dtype.itemsize)
+    while True:
+        bytes_read = file.readinto(buffer)
+        if progress_callback is not None:
+            progress_callback(file.tell())
+        num_records = bytes_read // record_dtype.itemsize
+        if num_records == 0:
+            break
+        yield np.frombuffer(buffer, dtype=record_dtype, count=num_records)
+        if bytes_read < len(buffer):
+            break
+
+
+def sum_spectroscopy_records(
+    file,
+    num_channels,
+    chunk_bytes=SPECTROSCOPY_READ_CHUNK_BYTES,
+    progress_callback=None,
+):
+    decays = np.zeros((num_channels, SPECTROSCOPY_NUM_BINS), dtype=np.uint64)
+    times = []
+    for records in iter_spectroscopy_chunks(
+        file, num_channels, chunk_bytes, progress_callback
+    ):
+        decays += np.sum(records["curves"], axis=0, dtype=np.uint64)
+        times.append(records["time"] / 1_000_000_000)
+    times = np.concatenate(times) if times else np.empty(0)
+    return times, decays
+
+
+def sum_spectroscopy_bin(
+    file_path, chunk_bytes=SPECTROSCOPY_READ_CHUNK_BYTES, progress_callback=None
+):
+    with open(file_path, "rb") as f:
+        if f.read(4) != SPECTROSCOPY_MAGIC_BYTES:
+            raise ValueError(f"Invalid file. {file_path} is not a valid Spectroscopy file")
+        metadata = read_metadata(f)
+        times, decays = sum_spectroscopy_records(
+            f, len(metadata["channels"]), chunk_bytes, progress_callback
+        )
+    return metadata, times, decays
+
+
+def read_spectroscopy_bin(file_path):
+    with open(file_path, "rb") as f:
+        if f.read(4) != SPECTROSCOPY_MAGIC_BYTES:
+            raise ValueError(f"Invalid file. {file_path} is not a valid Spectroscopy file")
+        metadata = read_metadata(f)
+        times, curves = decode_spectroscopy_records(f.read(), len(metadata["channels"]))
+    return metadata, times, curves
+
+
+class TimeAxis:
+    # Lazy view of the records timestamps in seconds, values are read only when indexed
+    def __init__(self, time_ns):
+        self.time_ns = time_ns
+
+    def __len__(self):
+        return len(self.time_ns)
+
+    def __getitem__(self, index):
+        return self.time_ns[index] / 1_000_000_000
+
+    def __array__(self, dtype=None):
+        times = np.asarray(self.time_ns) / 1_000_000_000
+        return times if dtype is None else times.astype(dtype)
+
+
+class SpectroscopyFile:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            if f.read(4) != SPECTROSCOPY_MAGIC_BYTES:
+                raise ValueError(
+                    f"Invalid file. {file_path} is not a valid Spectroscopy file"
+                )
+            self.metadata = read_metadata(f)
+            self.data_offset = f.tell()
+        self.channels = self.metadata["channels"]
+        self.record_dtype = spectroscopy_record_dtype(len(self.channels))
+        data_size = os.path.getsize(file_path) - self.data_offset
+        self.num_records = max(0, data_size // self.record_dtype.itemsize)
+        if self.num_records > 0:
+            # Only the fixed-size records region is mapped, pages are loaded on access
+            self.records = np.memmap(
+                file_path,
+                dtype=self.record_dtype,
+                mode="r",
+                offset=self.data_offset,
+                shape=(self.num_records,),
+            )
+        else:
+            self.records = np.zeros(0, dtype=self.record_dtype)
+        self.times = TimeAxis(self.records["time"])
+
+    def channel_curves(self, channel_position):
+        return self.records["curves"][:, channel_position, :]
+
+    @property
+    def channels_curves(self):
+        return {i: self.channel_curves(i) for i in range(len(self.channels))}
+
+    def sum_curves(self, chunk_bytes=SPECTROSCOPY_READ_CHUNK_BYTES, progress_callback=None):
+        # Streams the records region instead of paging it in through the memory map
+        with open(self.file_path, "rb") as f:
+            f.seek(self.data_offset)
+            times, decays = sum_spectroscopy_records(
+                f, len(self.channels), chunk_bytes, progress_callback
+            )
+        return times, decays
+
+    def window_range(self, t_start_s, t_end_s):
+        # Records are written in acquisition order, so the time column is sorted.
+        # bisect only touches the O(log n) pages it probes, np.searchsorted would
+        # first copy the whole strided column
+        time_ns = self.records["time"]
+        start = bisect.bisect_left(time_ns, t_start_s * 1_000_000_000)
+        end = bisect.bisect_right(time_ns, t_end_s * 1_000_000_000, lo=start)
+        return start, end
+
+    def window(self, t_start_s, t_end_s, channels=None):
+        start, end = self.window_range(t_start_s, t_end_s)
+        records = self.records[start:end]
+        times = records["time"] / 1_000_000_000
+        if channels is None:
+            return times, records["curves"]
+        positions = [self.channels.index(channel) for channel in channels]
+        return times, records["curves"][:, positions, :]
+
+    def window_decays(self, t_start_s, t_end_s, channels=None):
+        _, curves = self.window(t_start_s, t_end_s, channels)
+        return np.sum(curves, axis=0, dtype=np.uint64)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import numpy as np
+from components.phasors_points_store import (
+    PHASORS_POINTS_DTYPE,
+    PhasorsHistogram,
+    PhasorsStats,
+)
+
+SUMMARY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".flim-labs", "cache", "spectroscopy")
+SUMMARY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SUMMARY_CACHE_VERSION = 2
+# Finest phasors resolution, the coarser histograms are summed from it
+PHASORS_SUMMARY_HISTOGRAM_BINS = 512
+
+
+class SummaryCache:
+    # Small .npz summaries of previously opened acquisition files, keyed by
+    # absolute path, size and modification time, evicted in LRU order
+
+    @staticmethod
+    def get_cache_path(file_path):
+        stat = os.stat(file_path)
+        key = f"{SUMMARY_CACHE_VERSION}|{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        file_name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(SUMMARY_CACHE_DIR, f"{file_name}.summary.npz")
+
+    @staticmethod
+    def load(file_path):
+        try:
+            cache_path = SummaryCache.get_cache_path(file_path)
+            if not os.path.exists(cache_path):
+                return None
+            with np.load(cache_path, allow_pickle=False) as npz:
+                summary = {key: npz[key] for key in npz.files}
+            summary["metadata"] = json.loads(str(summary["metadata"]))
+            # Refresh the access time used for the LRU eviction
+            os.utime(cache_path)
+            return summary
+        except Exception:
+            return None
+
+    @staticmethod
+    def save(file_path, summary):
+        try:
+            cache_path = SummaryCache.get_cache_path(file_path)
+            os.makedirs(SUMMARY_CACHE_DIR, exist_ok=True)
+            data = dict(summary)
+            data["metadata"] = np.array(json.dumps(summary["metadata"]))
+            tmp_path = f"{cache_path}.tmp.npz"
+            np.savez_compressed(tmp_path, **data)
+            os.replace(tmp_path, cache_path)
+            SummaryCache.evict()
+        except Exception as e:
+            print(f"Error saving summary cache: {e}")
+
+    @staticmethod
+    def evict(max_bytes=SUMMARY_CACHE_MAX_BYTES):
+        if not os.path.isdir(SUMMARY_CACHE_DIR):
+            return
+        entries = []
+        for file_name in os.listdir(SUMMARY_CACHE_DIR):
+            if file_name.endswith(".summary.npz"):
+                path = os.path.join(SUMMARY_CACHE_DIR, file_name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+
+    @staticmethod
+    def spectroscopy_summary(metadata, times, decays):
+        time_range = (
+            np.array([times[0], times[-1]]) if len(times) > 0 else np.zeros(2)
+        )
+        return {
+            "metadata": metadata,
+            "decays": decays,
+            "num_records": np.array(len(times)),
+            "time_range": time_range,
+        }
+
+    @staticmethod
+    def phasors_summary(metadata, phasors_data):
+        # Per (channel, harmonic) running statistics and a histogram at the finest
+        # phasors resolution, enough to plot a file without decoding its points
+        keys = sorted(phasors_data.groups)
+        bins = PHASORS_SUMMARY_HISTOGRAM_BINS
+        counts = np.zeros(len(keys), dtype=np.int64)
+        nan_counts = np.zeros(len(keys), dtype=np.int64)
+        means = np.zeros((len(keys), 2))
+        m2 = np.zeros((len(keys), 2, 2))
+        histograms = np.zeros((len(keys), *PhasorsHistogram(bins).shape), dtype=np.uint32)
+        for i, (channel, harmonic) in enumerate(keys):
+            # Same precision as the points stores
+            g_values, s_values = (
+                values.astype(PHASORS_POINTS_DTYPE)
+                for values in phasors_data.points(channel, harmonic)
+            )
+            stats = PhasorsStats()
+            stats.add(g_values, s_values)
+            histogram = PhasorsHistogram(bins)
+            histogram.add(g_values, s_values)
+            counts[i] = stats.count
+            nan_counts[i] = stats.nan_count
+            means[i] = stats.mean
+            m2[i] = stats.m2
+            histograms[i] = histogram.counts
+        return {
+            "metadata": metadata,
+            "keys": np.array(keys, dtype=np.int64).reshape(-1, 2),
+            "counts": counts,
+            "nan_counts": nan_counts,
+            "means": means,
+            "m2": m2,
+            "histogram_bins": np.array(bins),
+            "histograms": histograms,
+        }
+
+    @staticmethod
+    def phasors_summary_groups(summary):
+        # {(channel, harmonic): (PhasorsStats, PhasorsHistogram)} of a phasors summary
+        bins = int(summary["histogram_bins"])
+        groups = {}
+        for i, (channel, harmonic) in enumerate(summary["keys"].tolist()):
+            stats = PhasorsStats()
+            stats.count = int(summary["counts"][i])
+            stats.nan_count = int(summary["nan_counts"][i])
+            stats.mean = np.array(summary["means"][i], dtype=np.float64)
+            stats.m2 = np.array(summary["m2"][i], dtype=np.float64)
+            histogram = PhasorsHistogram(bins)
+            if summary["histograms"][i].shape != histogram.shape:
+                return None
+            histogram.counts[:] = summary["histograms"][i]
+            groups[(channel, harmonic)] = (stats, histogram)
+        return groups
@@ -0,0 +1,477 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from components.spectroscopy_file import read_metadata
+
+TIME_TAGGER_MAGIC_BYTES = b"STT1"
+# Each record: 1 byte event type, 8 bytes micro time (ns), 8 bytes macro time (ns)
+TIME_TAGGER_RECORD_DTYPE = np.dtype(
+    [("event", "u1"), ("micro", "<f8"), ("macro", "<f8")]
+)
+TIME_TAGGER_CHUNK_RECORDS = 4 * 1024 * 1024
+# Record ranges decoded by every worker process
+TIME_TAGGER_RANGE_RECORDS = 4 * TIME_TAGGER_CHUNK_RECORDS
+TIME_TAGGER_MIN_PARALLEL_RECORDS = 2 * TIME_TAGGER_CHUNK_RECORDS
+TIME_TAGGER_MAX_WORKERS = 8
+MIN_INTENSITY_BIN_WIDTH_NS = 1_000
+MAX_INTENSITY_BIN_WIDTH_NS = 1_000_000_000
+MAX_INTENSITY_TRACE_BINS = 100_000_000
+FRAME_EVENT = 70
+LINE_EVENT = 76
+PIXEL_EVENT = 80
+MARKER_EVENTS = (FRAME_EVENT, LINE_EVENT, PIXEL_EVENT)
+MARKER_INDEX_KEYS = {
+    FRAME_EVENT: "frame_offsets",
+    LINE_EVENT: "line_offsets",
+    PIXEL_EVENT: "pixel_offsets",
+}
+
+
+class TimeTaggerFile:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            if f.read(4) != TIME_TAGGER_MAGIC_BYTES:
+                raise ValueError(
+                    f"Invalid file. {file_path} is not a valid Time Tagger file"
+                )
+            self.metadata = read_metadata(f)
+            self.data_offset = f.tell()
+        self.channels = self.metadata.get("channels") or []
+        self.laser_period_ns = self.metadata.get("laser_period_ns") or 25
+        data_size = os.path.getsize(file_path) - self.data_offset
+        # A truncated trailing record is ignored
+        self.num_records = max(0, data_size // TIME_TAGGER_RECORD_DTYPE.itemsize)
+
+    def last_macro_time(self):
+        # Records are fixed-size, the last one is read without scanning the file
+        if self.num_records == 0:
+            return 0.0
+        with open(self.file_path, "rb") as f:
+            f.seek(
+                self.data_offset
+                + (self.num_records - 1) * TIME_TAGGER_RECORD_DTYPE.itemsize
+            )
+            record = np.fromfile(f, dtype=TIME_TAGGER_RECORD_DTYPE, count=1)
+        return float(record["macro"][0])
+
+    def record_index(self, offset):
+        return (int(offset) - self.data_offset) // TIME_TAGGER_RECORD_DTYPE.itemsize
+
+    def marker_records(self, marker_offsets, i):
+        # Records range from the i-th marker to the next one of the same type
+        # (or the end of the file), to seek to a frame or a line without scanning
+        start_record = self.record_index(marker_offsets[i])
+        end_record = (
+            self.record_index(marker_offsets[i + 1])
+            if i + 1 < len(marker_offsets)
+            else self.num_records
+        )
+        return start_record, end_record
+
+    def marker_times(self, marker_offsets):
+        # Macro times of the marker records, read by offset
+        records = np.memmap(
+            self.file_path,
+            dtype=TIME_TAGGER_RECORD_DTYPE,
+            mode="r",
+            offset=self.data_offset,
+            shape=(self.num_records,),
+        )
+        indexes = (
+            np.asarray(marker_offsets, dtype=np.uint64) - np.uint64(self.data_offset)
+        ) // np.uint64(TIME_TAGGER_RECORD_DTYPE.itemsize)
+        return np.array(records["macro"][indexes.astype(np.int64)])
+
+    def chunks(
+        self,
+        chunk_records=TIME_TAGGER_CHUNK_RECORDS,
+        progress_callback=None,
+        start_record=0,
+        end_record=None,
+    ):
+        # Records are fixed-size, so any record range can be read by offset.
+        # progress_callback receives the file position after every chunk
+        end_record = self.num_records if end_record is None else end_record
+        with open(self.file_path, "rb") as f:
+            f.seek(self.data_offset + start_record * TIME_TAGGER_RECORD_DTYPE.itemsize)
+            remaining = end_record - start_record
+            while remaining > 0:
+                records = np.fromfile(
+                    f,
+                    dtype=TIME_TAGGER_RECORD_DTYPE,
+                    count=min(chunk_records, remaining),
+                )
+                if progress_callback is not None:
+                    progress_callback(f.tell())
+                if len(records) == 0:
+                    break
+                remaining -= len(records)
+                yield records
+
+
+def default_num_workers(time_tagger_file):
+    # Small files are decoded in the current process, a worker process pays the
+    # interpreter start and the imports
+    if time_tagger_file.num_records < TIME_TAGGER_MIN_PARALLEL_RECORDS:
+        return 1
+    return max(1, min(os.cpu_count() or 1, TIME_TAGGER_MAX_WORKERS))
+
+
+def record_ranges(num_records, range_records):
+    return [
+        (start, min(start + range_records, num_records))
+        for start in range(0, num_records, range_records)
+    ]
+
+
+def map_record_ranges(
+    time_tagger_file, range_fn, args, progress_callback=None, num_workers=None
+):
+    # Runs range_fn(time_tagger_file, start_record, end_record, *args) over record
+    # aligned ranges of the file in a pool of processes and returns the partial
+    # results in file order. With a single worker the whole file is one range
+    num_workers = (
+        default_num_workers(time_tagger_file) if num_workers is None else num_workers
+    )
+    num_records = time_tagger_file.num_records
+    if num_workers <= 1 or num_records == 0:
+        return [range_fn(time_tagger_file, 0, num_records, *args, progress_callback)]
+    range_records = max(
+        TIME_TAGGER_CHUNK_RECORDS,
+        min(TIME_TAGGER_RANGE_RECORDS, -(-num_records // num_workers)),
+    )
+    ranges = record_ranges(num_records, range_records)
+    results = [None] * len(ranges)
+    # Spawned workers, the caller may be a thread of the GUI process
+    executor = ProcessPoolExecutor(
+        max_workers=min(num_workers, len(ranges)),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    try:
+        futures = {
+            executor.submit(range_fn, time_tagger_file, start, end, *args): i
+            for i, (start, end) in enumerate(ranges)
+        }
+        records_done = 0
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            start, end = ranges[i]
+            records_done += end - start
+            if progress_callback is not None:
+                # Same file position reported by the single process readers
+                progress_callback(
+                    time_tagger_file.data_offset
+                    + records_done * TIME_TAGGER_RECORD_DTYPE.itemsize
+                )
+    finally:
+        # Pending ranges are dropped when a range fails or the reading is cancelled
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+def channel_positions(channels):
+    # Lookup table event byte -> position in channels, -1 for markers and other channels
+    positions = np.full(256, -1, dtype=np.int64)
+    positions[np.asarray(channels, dtype=np.int64)] = np.arange(len(channels))
+    positions[list(MARKER_EVENTS)] = -1
+    return positions
+
+
+def decay_histograms_chunk(records, positions, num_channels, num_bins, micro_range):
+    micro_min, micro_max = micro_range
+    channel = positions[records["event"]]
+    micro = records["micro"]
+    valid = (channel >= 0) & (micro >= micro_min) & (micro < micro_max)
+    bins = ((micro[valid] - micro_min) * (num_bins / (micro_max - micro_min))).astype(
+        np.int64
+    )
+    np.minimum(bins, num_bins - 1, out=bins)
+    counts = np.bincount(
+        channel[valid] * num_bins + bins, minlength=num_channels * num_bins
+    )
+    return counts.reshape(num_channels, num_bins).astype(np.uint64)
+
+
+def decay_histograms_range(
+    time_tagger_file,
+    start_record,
+    end_record,
+    positions,
+    num_channels,
+    num_bins,
+    micro_range,
+    progress_callback=None,
+):
+    decays = np.zeros((num_channels, num_bins), dtype=np.uint64)
+    for records in time_tagger_file.chunks(
+        progress_callback=progress_callback,
+        start_record=start_record,
+        end_record=end_record,
+    ):
+        decays += decay_histograms_chunk(
+            records, positions, num_channels, num_bins, micro_range
+        )
+    return decays
+
+
+def build_decay_histograms(
+    time_tagger_file,
+    num_bins=256,
+    micro_range=None,
+    channels=None,
+    progress_callback=None,
+    num_workers=None,
+):
+    # Rebuilds the decays from the photons micro times at any resolution,
+    # micro_range defaults to the whole laser period
+    channels = time_tagger_file.channels if channels is None else channels
+    if micro_range is None:
+        micro_range = (0.0, float(time_tagger_file.laser_period_ns))
+    if micro_range[1] <= micro_range[0]:
+        raise ValueError("Invalid micro time range")
+    positions = channel_positions(channels)
+    decays = np.zeros((len(channels), num_bins), dtype=np.uint64)
+    if len(channels) > 0:
+        # Partial histograms of the record ranges are summed
+        for range_decays in map_record_ranges(
+            time_tagger_file,
+            decay_histograms_range,
+            (positions, len(channels), num_bins, micro_range),
+            progress_callback,
+            num_workers,
+        ):
+            decays += range_decays
+    bin_edges = np.linspace(micro_range[0], micro_range[1], num_bins + 1)
+    return bin_edges, {channel: decays[i] for i, channel in enumerate(channels)}
+
+
+def decay_histograms_to_fit(bin_edges, channels_decays):
+    # Same items FittingDecayConfigPopup and fit_decay_curve get for the 256 bins decays
+    x_values = (bin_edges[:-1] + bin_edges[1:]) / 2
+    return [
+        {
+            "x": x_values,
+            "y": decay,
+            "title": "Channel " + str(channel + 1),
+            "channel_index": channel,
+            "time_shift": 0,
+        }
+        for channel, decay in channels_decays.items()
+    ]
+
+
+def intensity_counts_range(
+    time_tagger_file,
+    start_record,
+    end_record,
+    positions,
+    num_channels,
+    bin_width_ns,
+    progress_callback=None,
+):
+    # Returns (first_bin, counts) of the records range, counts covers the bins
+    # from first_bin to the last photon bin and grows if the macro times are not sorted
+    first_bin = None
+    counts = np.zeros((num_channels, 0), dtype=np.uint32)
+    end_bin = 0
+    for records in time_tagger_file.chunks(
+        progress_callback=progress_callback,
+        start_record=start_record,
+        end_record=end_record,
+    ):
+        channel = positions[records["event"]]
+        valid = channel >= 0
+        if not np.any(valid):
+            continue
+        bins = (records["macro"][valid] // bin_width_ns).astype(np.int64)
+        low_bin, high_bin = int(bins.min()), int(bins.max())
+        if high_bin >= MAX_INTENSITY_TRACE_BINS:
+            raise ValueError("Bin width too small for the acquisition length")
+        if first_bin is None:
+            first_bin = end_bin = low_bin
+        if low_bin < first_bin or high_bin >= first_bin + counts.shape[1]:
+            new_first_bin = min(first_bin, low_bin)
+            needed_bins = max(first_bin + counts.shape[1], high_bin + 1) - new_first_bin
+            size = max(needed_bins, 2 * counts.shape[1])
+            grown = np.zeros((num_channels, size), dtype=np.uint32)
+            offset = first_bin - new_first_bin
+            grown[:, offset : offset + counts.shape[1]] = counts
+            counts, first_bin = grown, new_first_bin
+        span = high_bin - low_bin + 1
+        chunk_counts = np.bincount(
+            channel[valid] * span + (bins - low_bin), minlength=num_channels * span
+        )
+        counts[:, low_bin - first_bin : high_bin - first_bin + 1] += (
+            chunk_counts.reshape(num_channels, span).astype(np.uint32)
+        )
+        end_bin = max(end_bin, high_bin + 1)
+    if first_bin is None:
+        return 0, counts
+    return first_bin, counts[:, : end_bin - first_bin]
+
+
+def build_intensity_traces(
+    time_tagger_file,
+    bin_width_ns,
+    channels=None,
+    progress_callback=None,
+    num_workers=None,
+):
+    # Photon counts per channel in macro time bins of bin_width_ns (1 us - 1 s)
+    if not MIN_INTENSITY_BIN_WIDTH_NS <= bin_width_ns <= MAX_INTENSITY_BIN_WIDTH_NS:
+        raise ValueError("Bin width must be between 1 us and 1 s")
+    channels = time_tagger_file.channels if channels is None else channels
+    if len(channels) == 0:
+        return {}
+    positions = channel_positions(channels)
+    num_bins = int(time_tagger_file.last_macro_time() // bin_width_ns) + 1
+    if num_bins > MAX_INTENSITY_TRACE_BINS:
+        raise ValueError("Bin width too small for the acquisition length")
+    ranges_counts = [
+        (first_bin, counts)
+        for first_bin, counts in map_record_ranges(
+            time_tagger_file,
+            intensity_counts_range,
+            (positions, len(channels), bin_width_ns),
+            progress_callback,
+            num_workers,
+        )
+        if counts.shape[1] > 0
+    ]
+    if len(ranges_counts) == 1 and ranges_counts[0][0] == 0:
+        traces = ranges_counts[0][1]
+    else:
+        # Traces of the record ranges are added at their bins offset
+        end_bin = max(
+            (first_bin + counts.shape[1] for first_bin, counts in ranges_counts),
+            default=0,
+        )
+        traces = np.zeros((len(channels), end_bin), dtype=np.uint32)
+        for first_bin, counts in ranges_counts:
+            traces[:, first_bin : first_bin + counts.shape[1]] += counts
+    return {channel: traces[i] for i, channel in enumerate(channels)}
+
+
+def intensity_traces_file_path(file_path, bin_width_ns):
+    return f"{os.path.splitext(file_path)[0]}_intensity_{bin_width_ns / 1000:g}us.npz"
+
+
+def save_intensity_traces(file_path, bin_width_ns, channels_traces):
+    output_file = intensity_traces_file_path(file_path, bin_width_ns)
+    channels = list(channels_traces.keys())
+    traces = (
+        np.stack([channels_traces[channel] for channel in channels])
+        if channels
+        else np.zeros((0, 0), dtype=np.uint32)
+    )
+    np.savez_compressed(
+        output_file,
+        channels=np.array(channels, dtype=np.int64),
+        bin_width_ns=np.array(bin_width_ns, dtype=np.float64),
+        traces=traces,
+    )
+    return output_file
+
+
+def load_intensity_traces(file_path):
+    with np.load(file_path, allow_pickle=False) as npz:
+        bin_width_ns = float(npz["bin_width_ns"])
+        channels_traces = {
+            int(channel): trace for channel, trace in zip(npz["channels"], npz["traces"])
+        }
+    return bin_width_ns, channels_traces
+
+
+def marker_index_range(
+    time_tagger_file,
+    start_record,
+    end_record,
+    events=MARKER_EVENTS,
+    progress_callback=None,
+):
+    record_size = TIME_TAGGER_RECORD_DTYPE.itemsize
+    offsets = {event: [] for event in events}
+    first_record = start_record
+    for records in time_tagger_file.chunks(
+        progress_callback=progress_callback,
+        start_record=start_record,
+        end_record=end_record,
+    ):
+        for event in events:
+            indexes = np.flatnonzero(records["event"] == event).astype(np.uint64)
+            offsets[event].append(
+                np.uint64(time_tagger_file.data_offset)
+                + (np.uint64(first_record) + indexes) * np.uint64(record_size)
+            )
+        first_record += len(records)
+    return {
+        event: (
+            np.concatenate(values) if values else np.empty(0, dtype=np.uint64)
+        )
+        for event, values in offsets.items()
+    }
+
+
+def build_marker_index(
+    time_tagger_file, progress_callback=None, num_workers=None, events=MARKER_EVENTS
+):
+    # Byte offsets of every frame, line and pixel marker record, {event: uint64 offsets}
+    ranges_offsets = map_record_ranges(
+        time_tagger_file, marker_index_range, (events,), progress_callback, num_workers
+    )
+    return {
+        event: np.concatenate([offsets[event] for offsets in ranges_offsets])
+        for event in events
+    }
+
+
+def marker_index_file_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}_markers.npz"
+
+
+def save_marker_index(time_tagger_file, marker_index):
+    # The .bin size and modification time are stored to detect a stale index
+    stat = os.stat(time_tagger_file.file_path)
+    output_file = marker_index_file_path(time_tagger_file.file_path)
+    tmp_file = f"{output_file}.tmp.npz"
+    np.savez(
+        tmp_file,
+        source_size=np.array(stat.st_size, dtype=np.int64),
+        source_mtime_ns=np.array(stat.st_mtime_ns, dtype=np.int64),
+        **{key: marker_index[event] for event, key in MARKER_INDEX_KEYS.items()},
+    )
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+def load_marker_index(time_tagger_file, events=MARKER_EVENTS):
+    # Only the requested offsets are read from the sidecar
+    index_file = marker_index_file_path(time_tagger_file.file_path)
+    if not os.path.exists(index_file):
+        return None
+    stat = os.stat(time_tagger_file.file_path)
+    with np.load(index_file, allow_pickle=False) as npz:
+        if (
+            int(npz["source_size"]) != stat.st_size
+            or int(npz["source_mtime_ns"]) != stat.st_mtime_ns
+        ):
+            return None
+        return {event: npz[MARKER_INDEX_KEYS[event]] for event in events}
+
+
+def get_marker_index(
+    time_tagger_file, progress_callback=None, num_workers=None, events=MARKER_EVENTS
+):
+    # Loads the <file>_markers.npz sidecar, built with one pass over the file when
+    # missing. A partial index (some events only) is not saved
+    marker_index = load_marker_index(time_tagger_file, events)
+    if marker_index is None:
+        marker_index = build_marker_index(
+            time_tagger_file, progress_callback, num_workers, events
+        )
+        if set(events) == set(MARKER_EVENTS):
+            save_marker_index(time_tagger_file, marker_index)
+    return marker_index
@@ -0,0 +1,544 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt6.QtWidgets import (
+    QFileDialog,
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QApplication,
+)
+from PyQt6.QtCore import Qt, QThreadPool
+from PyQt6.QtGui import QColor, QIcon
+from components.correlation import correlate_time_tagger, save_correlations
+from components.fitting_config_popup import FittingDecayConfigPopup
+from components.flim_image import (
+    FLIM_IMAGE_NUM_BINS,
+    reconstruct_flim_images,
+    save_flim_images,
+)
+from components.gui_styles import GUIStyles
+from components.input_number_control import InputNumberControl, InputFloatControl
+from components.input_text_control import InputTextControl
+from components.logo_utilities import TitlebarIcon
+from components.progress_bar import ProgressBar
+from components.read_data import ReadBinWorkerSignals, ReadBinTask, ReadData
+from components.resource_path import resource_path
+from components.time_tagger_file import (
+    MAX_INTENSITY_BIN_WIDTH_NS,
+    MIN_INTENSITY_BIN_WIDTH_NS,
+    TIME_TAGGER_MAGIC_BYTES,
+    TimeTaggerFile,
+    build_decay_histograms,
+    build_intensity_traces,
+    decay_histograms_to_fit,
+    load_intensity_traces,
+    save_intensity_traces,
+)
+from settings import *
+
+
+class TimeTaggerReaderPopup(QWidget):
+    # Offline processing of the photons stored in a time tagger (STT1) file
+    def __init__(self, window):
+        super().__init__()
+        self.app = window
+        self.widgets = {}
+        self.time_tagger_file = None
+        self.processing_task = None
+        self.setWindowTitle("Time tagger data")
+        TitlebarIcon.setup(self)
+        GUIStyles.customize_theme(self, bg=QColor(20, 20, 20))
+        self.layout = QVBoxLayout()
+        self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+        self.layout.addLayout(self.init_file_load_ui())
+        self.layout.addSpacing(20)
+        self.layout.addLayout(self.init_decay_histograms_ui())
+        self.layout.addSpacing(20)
+        self.layout.addLayout(self.init_intensity_traces_ui())
+        self.layout.addSpacing(20)
+        self.layout.addLayout(self.init_correlation_ui())
+        self.layout.addSpacing(20)
+        self.layout.addLayout(self.init_flim_images_ui())
+        self.layout.addSpacing(20)
+        self.layout.addLayout(self.init_progress_ui())
+        self.setLayout(self.layout)
+        self.setStyleSheet(GUIStyles.plots_config_popup_style())
+        self.app.widgets[TIME_TAGGER_READER_POPUP] = self
+        self.set_processing_state(False)
+        self.center_window()
+
+    def init_file_load_ui(self):
+        v_box = QVBoxLayout()
+        input_desc = QLabel("LOAD A TIME TAGGER FILE:")
+        input_desc.setStyleSheet("font-size: 16px; font-family: 'Montserrat'")
+        control_row = QHBoxLayout()
+        _, input = InputTextControl.setup(
+            label="",
+            placeholder="Load .bin file",
+            event_callback=lambda text: None,
+        )
+        input.setReadOnly(True)
+        input.setStyleSheet(GUIStyles.set_input_text_style())
+        self.widgets["load_time_tagger_input"] = input
+        load_file_btn = QPushButton()
+        load_file_btn.setIcon(QIcon(resource_path("assets/folder-white.png")))
+        load_file_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_start_btn_style(load_file_btn)
+        load_file_btn.setFixedHeight(36)
+        load_file_btn.clicked.connect(self.on_load_file_btn_clicked)
+        self.widgets["load_time_tagger_btn"] = load_file_btn
+        control_row.addWidget(input)
+        control_row.addWidget(load_file_btn)
+        v_box.addWidget(input_desc)
+        v_box.addSpacing(10)
+        v_box.addLayout(control_row)
+        return v_box
+
+    def init_decay_histograms_ui(self):
+        v_box = QVBoxLayout()
+        desc = QLabel("REBUILD DECAYS:")
+        desc.setStyleSheet("font-size: 16px; font-family: 'Montserrat'")
+        controls_row = QHBoxLayout()
+        _, bins_input = InputNumberControl.setup(
+            "Bins",
+            16,
+            16384,
+            256,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["decay_bins_input"] = bins_input
+        _, micro_min_input = InputFloatControl.setup(
+            "Micro time min (ns)",
+            0.0,
+            1000.0,
+            0.0,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["decay_micro_min_input"] = micro_min_input
+        _, micro_max_input = InputFloatControl.setup(
+            "Micro time max (ns)",
+            0.0,
+            1000.0,
+            25.0,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["decay_micro_max_input"] = micro_max_input
+        rebuild_btn = QPushButton("REBUILD AND FIT")
+        rebuild_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(rebuild_btn)
+        rebuild_btn.setFixedHeight(40)
+        rebuild_btn.clicked.connect(self.on_rebuild_decays_btn_clicked)
+        self.widgets["rebuild_decays_btn"] = rebuild_btn
+        controls_row.addWidget(rebuild_btn, alignment=Qt.AlignmentFlag.AlignBottom)
+        v_box.addWidget(desc)
+        v_box.addSpacing(10)
+        v_box.addLayout(controls_row)
+        return v_box
+
+    def init_intensity_traces_ui(self):
+        v_box = QVBoxLayout()
+        desc = QLabel("INTENSITY TRACES:")
+        desc.setStyleSheet("font-size: 16px; font-family: 'Montserrat'")
+        controls_row = QHBoxLayout()
+        _, bin_width_input = InputFloatControl.setup(
+            "Bin width (µs)",
+            MIN_INTENSITY_BIN_WIDTH_NS / 1000,
+            MAX_INTENSITY_BIN_WIDTH_NS / 1000,
+            1000.0,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["intensity_bin_width_input"] = bin_width_input
+        build_btn = QPushButton("BUILD TRACES")
+        build_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(build_btn)
+        build_btn.setFixedHeight(40)
+        build_btn.clicked.connect(self.on_build_intensity_traces_btn_clicked)
+        self.widgets["build_intensity_traces_btn"] = build_btn
+        controls_row.addWidget(build_btn, alignment=Qt.AlignmentFlag.AlignBottom)
+        # Traces saved by a previous build, no time tagger file needed
+        load_btn = QPushButton("LOAD TRACES")
+        load_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(load_btn)
+        load_btn.setFixedHeight(40)
+        load_btn.clicked.connect(self.on_load_intensity_traces_btn_clicked)
+        self.widgets["load_intensity_traces_btn"] = load_btn
+        controls_row.addWidget(load_btn, alignment=Qt.AlignmentFlag.AlignBottom)
+        controls_row.addStretch(1)
+        intensity_widget = pg.PlotWidget()
+        intensity_widget.setLabel("left", "Photon counts", units="")
+        intensity_widget.setLabel("bottom", "Time", units="s")
+        intensity_widget.setBackground("#141414")
+        intensity_widget.addLegend()
+        # Traces can have millions of bins, only the visible range is drawn, peak-decimated
+        intensity_widget.setClipToView(True)
+        intensity_widget.setDownsampling(auto=True, mode="peak")
+        intensity_widget.setMinimumHeight(250)
+        intensity_widget.setVisible(False)
+        self.widgets["intensity_plot"] = intensity_widget
+        v_box.addWidget(desc)
+        v_box.addSpacing(10)
+        v_box.addLayout(controls_row)
+        v_box.addSpacing(10)
+        v_box.addWidget(intensity_widget)
+        return v_box
+
+    def init_correlation_ui(self):
+        v_box = QVBoxLayout()
+        desc = QLabel("PHOTON CORRELATION (AUTO/CROSS):")
+        desc.setStyleSheet("font-size: 16px; font-family: 'Montserrat'")
+        controls_row = QHBoxLayout()
+        _, bin_width_input = InputFloatControl.setup(
+            "Bin width (µs)",
+            0.01,
+            1000.0,
+            1.0,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["correlation_bin_width_input"] = bin_width_input
+        _, max_lag_input = InputFloatControl.setup(
+            "Max lag (ms)",
+            0.01,
+            10000.0,
+            1000.0,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["correlation_max_lag_input"] = max_lag_input
+        correlate_btn = QPushButton("CORRELATE")
+        correlate_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(correlate_btn)
+        correlate_btn.setFixedHeight(40)
+        correlate_btn.clicked.connect(self.on_correlate_btn_clicked)
+        self.widgets["correlate_btn"] = correlate_btn
+        controls_row.addWidget(correlate_btn, alignment=Qt.AlignmentFlag.AlignBottom)
+        controls_row.addStretch(1)
+        correlation_widget = pg.PlotWidget()
+        correlation_widget.setLabel("left", "G(τ)", units="")
+        correlation_widget.setLabel("bottom", "τ", units="s")
+        correlation_widget.setBackground("#141414")
+        correlation_widget.setLogMode(x=True, y=False)
+        correlation_widget.addLegend()
+        correlation_widget.setMinimumHeight(250)
+        correlation_widget.setVisible(False)
+        self.widgets["correlation_plot"] = correlation_widget
+        v_box.addWidget(desc)
+        v_box.addSpacing(10)
+        v_box.addLayout(controls_row)
+        v_box.addSpacing(10)
+        v_box.addWidget(correlation_widget)
+        return v_box
+
+    def init_flim_images_ui(self):
+        v_box = QVBoxLayout()
+        desc = QLabel("FLIM IMAGES (FRAME/LINE/PIXEL MARKERS):")
+        desc.setStyleSheet("font-size: 16px; font-family: 'Montserrat'")
+        controls_row = QHBoxLayout()
+        _, bins_input = InputNumberControl.setup(
+            "Decay bins",
+            4,
+            1024,
+            FLIM_IMAGE_NUM_BINS,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["flim_bins_input"] = bins_input
+        _, harmonic_input = InputNumberControl.setup(
+            "Harmonic",
+            1,
+            4,
+            1,
+            controls_row,
+            lambda value: None,
+        )
+        self.widgets["flim_harmonic_input"] = harmonic_input
+        reconstruct_btn = QPushButton("RECONSTRUCT")
+        reconstruct_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(reconstruct_btn)
+        reconstruct_btn.setFixedHeight(40)
+        reconstruct_btn.clicked.connect(self.on_reconstruct_flim_btn_clicked)
+        self.widgets["reconstruct_flim_btn"] = reconstruct_btn
+        controls_row.addWidget(reconstruct_btn, alignment=Qt.AlignmentFlag.AlignBottom)
+        controls_row.addStretch(1)
+        flim_widget = pg.GraphicsLayoutWidget()
+        flim_widget.setBackground("#141414")
+        flim_widget.setMinimumHeight(250)
+        flim_widget.setVisible(False)
+        self.widgets["flim_images"] = flim_widget
+        v_box.addWidget(desc)
+        v_box.addSpacing(10)
+        v_box.addLayout(controls_row)
+        v_box.addSpacing(10)
+        v_box.addWidget(flim_widget)
+        return v_box
+
+    def init_progress_ui(self):
+        progress_row = QHBoxLayout()
+        progress_bar = ProgressBar(
+            label_text="Processing...", visible=False, color=PALETTE_BLUE_1
+        )
+        self.widgets["progress_bar"] = progress_bar
+        cancel_btn = QPushButton("CANCEL")
+        cancel_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(cancel_btn)
+        cancel_btn.setFixedHeight(36)
+        cancel_btn.clicked.connect(self.on_cancel_btn_clicked)
+        self.widgets["cancel_btn"] = cancel_btn
+        progress_row.addWidget(progress_bar, 1)
+        progress_row.addWidget(cancel_btn)
+        return progress_row
+
+    def on_load_file_btn_clicked(self):
+        file_name = ReadData.read_bin(
+            self, TIME_TAGGER_MAGIC_BYTES, "Time Tagger", "time_tagger"
+        )
+        if not file_name:
+            return
+        try:
+            self.time_tagger_file = TimeTaggerFile(file_name)
+        except Exception:
+            ReadData.show_warning_message(
+                "Error reading file", "Error reading Time Tagger file"
+            )
+            return
+        self.widgets["load_time_tagger_input"].setText(file_name)
+        self.widgets["decay_micro_min_input"].setValue(0.0)
+        self.widgets["decay_micro_max_input"].setValue(
+            float(self.time_tagger_file.laser_period_ns)
+        )
+        self.set_processing_state(False)
+
+    def start_processing(self, process_cb, on_success):
+        # process_cb(file_name, progress_callback) runs in a ReadBinTask
+        signals = ReadBinWorkerSignals()
+        signals.progress.connect(self.on_processing_progress)
+        signals.success.connect(
+            lambda result: self.on_processing_finished(on_success, result)
+        )
+        signals.error.connect(self.on_processing_error)
+        signals.cancelled.connect(lambda: self.on_processing_finished(None, None))
+        self.processing_task = ReadBinTask(
+            self.time_tagger_file.file_path, process_cb, signals
+        )
+        self.set_processing_state(True)
+        QThreadPool.globalInstance().start(self.processing_task)
+
+    def on_rebuild_decays_btn_clicked(self):
+        if self.time_tagger_file is None:
+            return
+        num_bins = self.widgets["decay_bins_input"].value()
+        micro_range = (
+            self.widgets["decay_micro_min_input"].value(),
+            self.widgets["decay_micro_max_input"].value(),
+        )
+        if micro_range[1] <= micro_range[0]:
+            ReadData.show_warning_message(
+                "Invalid range", "Micro time max must be greater than micro time min"
+            )
+            return
+        time_tagger_file = self.time_tagger_file
+
+        def process(file_name, progress_callback):
+            return build_decay_histograms(
+                time_tagger_file,
+                num_bins,
+                micro_range,
+                progress_callback=progress_callback,
+            )
+
+        self.start_processing(process, self.show_decays_fitting)
+
+    def on_build_intensity_traces_btn_clicked(self):
+        if self.time_tagger_file is None:
+            return
+        bin_width_ns = self.widgets["intensity_bin_width_input"].value() * 1000
+        time_tagger_file = self.time_tagger_file
+
+        def process(file_name, progress_callback):
+            channels_traces = build_intensity_traces(
+                time_tagger_file, bin_width_ns, progress_callback=progress_callback
+            )
+            save_intensity_traces(file_name, bin_width_ns, channels_traces)
+            return bin_width_ns, channels_traces
+
+        self.start_processing(process, self.show_intensity_traces)
+
+    def on_load_intensity_traces_btn_clicked(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self,
+            "Load intensity traces",
+            "",
+            "Intensity traces (*_intensity_*.npz)",
+            options=QFileDialog.Option.DontUseNativeDialog,
+        )
+        if not file_name:
+            return
+        try:
+            result = load_intensity_traces(file_name)
+        except Exception:
+            ReadData.show_warning_message(
+                "Error reading file", "Error reading intensity traces file"
+            )
+            return
+        self.show_intensity_traces(result)
+
+    def show_intensity_traces(self, result):
+        bin_width_ns, channels_traces = result
+        intensity_widget = self.widgets["intensity_plot"]
+        intensity_widget.clear()
+        bin_width_s = bin_width_ns / 1_000_000_000
+        for i, (channel, trace) in enumerate(channels_traces.items()):
+            intensity_widget.plot(
+                np.arange(len(trace)) * bin_width_s,
+                trace,
+                pen=pg.mkPen(color=pg.intColor(i), width=1),
+                name=f"Channel {channel + 1}",
+            )
+        intensity_widget.setVisible(True)
+
+    def on_correlate_btn_clicked(self):
+        if self.time_tagger_file is None:
+            return
+        bin_width_ns = self.widgets["correlation_bin_width_input"].value() * 1000
+        max_lag_ns = self.widgets["correlation_max_lag_input"].value() * 1_000_000
+        time_tagger_file = self.time_tagger_file
+        channels = time_tagger_file.channels
+        channel_pairs = [
+            (channel_a, channel_b)
+            for i, channel_a in enumerate(channels)
+            for channel_b in channels[i:]
+        ]
+
+        def process(file_name, progress_callback):
+            correlations = correlate_time_tagger(
+                time_tagger_file,
+                channel_pairs,
+                bin_width_ns,
+                max_lag_ns,
+                progress_callback=progress_callback,
+            )
+            save_correlations(file_name, bin_width_ns, correlations)
+            return correlations
+
+        self.start_processing(process, self.show_correlations)
+
+    def show_correlations(self, correlations):
+        correlation_widget = self.widgets["correlation_plot"]
+        correlation_widget.clear()
+        for i, ((channel_a, channel_b), (taus, correlation)) in enumerate(
+            correlations.items()
+        ):
+            correlation_widget.plot(
+                taus / 1_000_000_000,
+                correlation,
+                pen=pg.mkPen(color=pg.intColor(i), width=2),
+                name=f"Channel {channel_a + 1} x Channel {channel_b + 1}",
+            )
+        correlation_widget.setVisible(True)
+
+    def on_reconstruct_flim_btn_clicked(self):
+        if self.time_tagger_file is None:
+            return
+        num_bins = self.widgets["flim_bins_input"].value()
+        harmonic = self.widgets["flim_harmonic_input"].value()
+        time_tagger_file = self.time_tagger_file
+
+        def process(file_name, progress_callback):
+            images = reconstruct_flim_images(
+                time_tagger_file,
+                num_bins,
+                harmonic=harmonic,
+                progress_callback=progress_callback,
+            )
+            save_flim_images(file_name, images)
+            return images
+
+        self.start_processing(process, self.show_flim_images)
+
+    def show_flim_images(self, images):
+        # Intensity summed over the frames, one image per channel
+        flim_widget = self.widgets["flim_images"]
+        flim_widget.clear()
+        for i, (channel, intensity) in enumerate(images["intensity"].items()):
+            plot = flim_widget.addPlot(row=0, col=i, title=f"Channel {channel + 1}")
+            plot.setAspectLocked(True)
+            plot.invertY(True)
+            image = pg.ImageItem(intensity.sum(axis=0).T)
+            image.setLookupTable(self.app.create_hot_colormap().getLookupTable(0, 1.0))
+            plot.addItem(image)
+        flim_widget.setVisible(True)
+
+    def show_decays_fitting(self, result):
+        bin_edges, channels_decays = result
+        data = decay_histograms_to_fit(bin_edges, channels_decays)
+        if not data:
+            return
+        self.app.fitting_config_popup = FittingDecayConfigPopup(
+            self.app,
+            data,
+            read_mode=False,
+            preloaded_fitting=None,
+            save_plot_img=True,
+            y_data_shift=0,
+            laser_period_ns=self.time_tagger_file.laser_period_ns,
+        )
+        self.app.fitting_config_popup.show()
+
+    def set_processing_state(self, processing):
+        progress_bar = self.widgets["progress_bar"]
+        progress_bar.update_progress(0, 1, "Processing...")
+        progress_bar.set_visible(processing)
+        self.widgets["cancel_btn"].setVisible(processing)
+        self.widgets["load_time_tagger_btn"].setEnabled(not processing)
+        self.widgets["load_intensity_traces_btn"].setEnabled(not processing)
+        file_loaded = self.time_tagger_file is not None
+        for key, widget in self.widgets.items():
+            if key.endswith("_input") and key != "load_time_tagger_input":
+                widget.setEnabled(file_loaded and not processing)
+            if key.endswith("_btn") and key not in (
+                "load_time_tagger_btn",
+                "load_intensity_traces_btn",
+                "cancel_btn",
+            ):
+                widget.setEnabled(file_loaded and not processing)
+
+    def on_processing_progress(self, bytes_read, total_bytes):
+        self.widgets["progress_bar"].update_progress(
+            bytes_read,
+            max(total_bytes, 1),
+            f"Processing... {bytes_read / 1_048_576:.1f}/{total_bytes / 1_048_576:.1f} MB",
+        )
+
+    def on_processing_finished(self, on_success, result):
+        self.processing_task = None
+        self.set_processing_state(False)
+        if on_success is not None:
+            on_success(result)
+
+    def on_processing_error(self, error):
+        self.on_processing_finished(None, None)
+        ReadData.show_warning_message(
+            "Error processing file", f"Error processing Time Tagger file: {error}"
+        )
+
+    def on_cancel_btn_clicked(self):
+        if self.processing_task is not None:
+            self.processing_task.cancel()
+
+    def closeEvent(self, event):
+        if self.processing_task is not None:
+            self.processing_task.cancel()
+        super().closeEvent(event)
+
+    def center_window(self):
+        self.setMinimumWidth(600)
+        window_geometry = self.frameGeometry()
+        screen_geometry = QApplication.primaryScreen().availableGeometry().center()
+        window_geometry.moveCenter(screen_geometry)
+        self.move(window_geometry.topLeft())
@@ -61,25 +61,35 @@ with open(phasors_file_path, "rb") as f:
     tau_ns = metadata.get("tau_ns")
     if tau_ns is not None:
         print("Tau: " + str(tau_ns) + "ns")
-    try:
-        while True:
-            bytes_read = f.read(32)
-            if not bytes_read:
-                raise StopIteration
-            try:
-                time_ns, channel_name, harmonic_name, g, s = struct.unpack(
-                    "QIIdd", bytes_read
-                )
-            except struct.error as e:
-                print(f"Error unpacking phasors_data: {e}")
-                raise StopIteration
-            if channel_name not in phasors_data:                
-                phasors_data[channel_name] = {}
-            if harmonic_name not in phasors_data[channel_name]:                    
-                phasors_data[channel_name][harmonic_name] = []        
-            phasors_data[channel_name][harmonic_name].append((g, s))    
-    except StopIteration:
-        pass
+
+    # Decode all the phasors records at once into columns (time_ns, channel, harmonic, g, s)
+    phasors_record_dtype = np.dtype(
+        [
+            ("time_ns", "<u8"),
+            ("channel", "<u4"),
+            ("harmonic", "<u4"),
+            ("g", "<f8"),
+            ("s", "<f8"),
+        ]
+    )
+    buffer = f.read()
+    num_records = len(buffer) // phasors_record_dtype.itemsize
+    records = np.frombuffer(buffer, dtype=phasors_record_dtype, count=num_records)
+
+    # Group points by (channel, harmonic), keeping the time order inside each group
+    keys = (records["channel"].astype(np.uint64) << np.uint64(32)) | records["harmonic"]
+    order = np.argsort(keys, kind="stable")
+    g_column = records["g"][order]
+    s_column = records["s"][order]
+    unique_keys, starts = np.unique(keys[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    for key, start, end in zip(unique_keys, starts, ends):
+        channel_name = int(key >> np.uint64(32))
+        harmonic_name = int(key & np.uint64(0xFFFFFFFF))
+        phasors_data.setdefault(channel_name, {})[harmonic_name] = (
+            g_column[start:end],
+            s_column[start:end],
+        )
 
 
 # READ SPECTROSCOPY FILE
@@ -98,22 +108,26 @@ with open(spectroscopy_file_path, 'rb') as f:
     null = None
     metadata = eval(f.read(json_length).decode("utf-8"))
     spectroscopy_laser_period = metadata["laser_period_ns"]      
-    channel_curves = [[] for _ in range(len(metadata["channels"]))]
-    times = []
     number_of_channels = len(metadata["channels"])
-    channel_values_unpack_string = 'I' * 256 
-    while True:        
-        data = f.read(8)
-        if not data:
+    # Each record: 8 bytes timestamp + 256 uint32 counts for every active channel
+    record_dtype = np.dtype(
+        [("time", "<f8"), ("curves", "<u4", (number_of_channels, 256))]
+    )
+    chunk_size = max(1, (64 * 1024 * 1024) // record_dtype.itemsize) * record_dtype.itemsize
+    channel_curves = np.zeros((number_of_channels, 256), dtype=np.uint64)
+    times = []
+
+    # Read the data in large chunks, summing the decay curves of each channel
+    while True:
+        data = f.read(chunk_size)
+        num_records = len(data) // record_dtype.itemsize
+        if num_records == 0:
             break
-        (time,) = struct.unpack('d', data)    
-        for i in range(number_of_channels):
-            data = f.read(4 * 256)  
-            if len(data) < 4 * 256:
-                break
-            curve = struct.unpack(channel_values_unpack_string, data)    
-            channel_curves[i].append(np.array(curve))
-        times.append(time / 1_000_000_000)
+        records = np.frombuffer(data, dtype=record_dtype, count=num_records)
+        channel_curves += np.sum(records["curves"], axis=0, dtype=np.uint64)
+        times.append(records["time"] / 1_000_000_000)
+    times = np.concatenate(times) if times else np.empty(0)
+
     spectroscopy_times = times 
     spectroscopy_channels_curves = channel_curves     
 
@@ -148,7 +162,7 @@ ax.grid(True)
 total_max = 0
 total_min = 9999999999999
 for i in range(number_of_channels):
-    sum_curve = np.sum(spectroscopy_channels_curves[i], axis=0)
+    sum_curve = spectroscopy_channels_curves[i]
     max_val = np.max(sum_curve)
     min_val = np.min(sum_curve)
     if max_val > total_max:
@@ -170,11 +184,8 @@ for i, (channel, harmonics) in enumerate(phasors_data.items(), start=1):
     ax.plot(x, y)
     ax.set_aspect('equal') 
  
-    for harmonic, values in harmonics.items():
-        if values:
-            g_values, s_values = zip(*values)
-            g_values = np.array(g_values)
-            s_values = np.array(s_values)
+    for harmonic, (g_values, s_values) in harmonics.items():
+        if len(g_values) > 0:
             mask = (np.abs(g_values) < 1e9) & (np.abs(s_values) < 1e9)
             g_values = g_values[mask]
             s_values = s_values[mask]
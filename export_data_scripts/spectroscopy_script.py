@@ -42,23 +42,25 @@ with open(file_path, 'rb') as f:
     if "tau_ns" in metadata and metadata["tau_ns"] is not None:
         print("Tau: " + str(metadata["tau_ns"]) + "ns")   
         
-    channel_curves = [[] for _ in range(len(metadata["channels"]))]
-    times = []
     number_of_channels = len(metadata["channels"])
-    channel_values_unpack_string = 'I' * 256 
-    
-    while True:        
-        data = f.read(8)
-        if not data:
+    # Each record: 8 bytes timestamp + 256 uint32 counts for every active channel
+    record_dtype = np.dtype(
+        [("time", "<f8"), ("curves", "<u4", (number_of_channels, 256))]
+    )
+    chunk_size = max(1, (64 * 1024 * 1024) // record_dtype.itemsize) * record_dtype.itemsize
+    channel_curves = np.zeros((number_of_channels, 256), dtype=np.uint64)
+    times = []
+
+    # Read the data in large chunks, summing the decay curves of each channel
+    while True:
+        data = f.read(chunk_size)
+        num_records = len(data) // record_dtype.itemsize
+        if num_records == 0:
             break
-        (time,) = struct.unpack('d', data)    
-        for i in range(number_of_channels):
-            data = f.read(4 * 256)  
-            if len(data) < 4 * 256:
-                break
-            curve = struct.unpack(channel_values_unpack_string, data)    
-            channel_curves[i].append(np.array(curve))
-        times.append(time / 1_000_000_000)    
+        records = np.frombuffer(data, dtype=record_dtype, count=num_records)
+        channel_curves += np.sum(records["curves"], axis=0, dtype=np.uint64)
+        times.append(records["time"] / 1_000_000_000)
+    times = np.concatenate(times) if times else np.empty(0)
 
     # PLOTTING
     plt.xlabel(f"Time (ns, Laser period = {laser_period_ns} ns)")
@@ -73,7 +75,7 @@ with open(file_path, 'rb') as f:
     total_max = 0
     total_min = 9999999999999
     for i in range(len(channel_curves)):
-        sum_curve = np.sum(channel_curves[i], axis=0)
+        sum_curve = channel_curves[i]
         max = np.max(sum_curve)
         min = np.min(sum_curve)
         if max > total_max:
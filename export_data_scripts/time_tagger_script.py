@@ -1,7 +1,11 @@
 import struct
+import numpy as np
 import pandas as pd
 import os
 import json
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 import pyarrow as pa
 import pyarrow.parquet as pq
@@ -13,7 +17,58 @@ file_path = "<FILE-PATH>"
 init(autoreset=True)  
 warnings.filterwarnings("ignore", category=FutureWarning, module="pandas")
 
-def read_time_tagger_bin(file_path, chunk_size=100000):
+# Each record: 1 byte event type, 8 bytes Micro Time (ns, f64), 8 bytes Macro Time (ns, f64)
+TIME_TAGGER_RECORD_DTYPE = np.dtype(
+    [("event", "u1"), ("micro", "<f8"), ("macro", "<f8")]
+)
+# Event byte -> label, used as categories so the Event column stores 1-byte codes
+EVENT_CATEGORIES = [
+    {70: "F", 76: "L", 80: "P"}.get(event, f"ch{event + 1}") for event in range(256)
+]
+
+
+def read_header(f):
+    """
+    Reads and parses the header from the binary file.
+
+    Parameters:
+        f (file object): File object for reading the binary file.
+
+    Returns:
+        dict: Parsed header information in JSON format.
+    """
+    if f.read(4) != b"STT1":
+        print(Fore.RED + "Invalid data file")
+        exit(0)
+    header_length_bytes = f.read(4)
+    header_length = struct.unpack("<I", header_length_bytes)[0]
+    header_json = f.read(header_length).decode("utf-8")
+    header = json.loads(header_json)
+    return header
+
+
+def header_info(header):
+    """
+    Formats the enabled channels and the laser period stored in the header.
+
+    Parameters:
+        header (dict): Parsed header information.
+
+    Returns:
+        str: Enabled channels information.
+        str: Laser period information.
+    """
+    enabled_channels = laser_period = None
+    if "channels" in header and header["channels"] is not None:
+        enabled_channels = ", ".join(
+            ["Channel " + str(ch + 1) for ch in header["channels"]]
+        )
+    if "laser_period_ns" in header and header["laser_period_ns"] is not None:
+        laser_period = str(header["laser_period_ns"]) + "ns"
+    return enabled_channels, laser_period
+
+
+def read_time_tagger_bin(file_path, chunk_size=1000000):
     """
     Reads data from a Time Tagger binary file (.bin) and yields data in chunks as DataFrames.
     The .bin file consists of records with a length of 17 bytes, where 1 byte represents the event type (Channel, Pixel, Line, Frame), 
@@ -21,10 +76,12 @@ def read_time_tagger_bin(file_path, chunk_size=100000):
     The first 4 bytes are magic bytes used to uniquely identify a "spectroscopy time tagger" .bin file. 
     The .bin file also has a variable-length header containing information about the enabled channels and 
     the laser period of the acquisition.
+    Each chunk is decoded at once with a packed record dtype, the Event column is a categorical
+    whose codes are the raw event bytes (F = Frame, L = Line, P = Pixel, chN = Channel N).
 
     Parameters:
         file_path (str): Path to the .bin file.
-        chunk_size (int): Number of records per chunk (default is 100000).
+        chunk_size (int): Number of records per chunk (default is 1000000).
 
     Yields:
         pd.DataFrame: A DataFrame containing the data (Event, Micro Time, Macro Time) for each chunk.
@@ -34,86 +91,285 @@ def read_time_tagger_bin(file_path, chunk_size=100000):
     if not os.path.exists(file_path):
         print(Fore.RED + f"File not found: {file_path}")
         return
-    record_size = 17  # 1 byte per channel, 8 bytes per micro_time (f64), 8 bytes per macro_time (f64)
-
-    def read_header(f):
-        """
-        Reads and parses the header from the binary file.
-
-        Parameters:
-            f (file object): File object for reading the binary file.
-
-        Returns:
-            dict: Parsed header information in JSON format.
-        """
-        if f.read(4) != b"STT1":
-            print(Fore.RED + "Invalid data file")
-            exit(0)
-        header_length_bytes = f.read(4)
-        header_length = struct.unpack("<I", header_length_bytes)[0]
-        header_json = f.read(header_length).decode("utf-8")
-        header = json.loads(header_json)
-        return header
-
-    def record_generator(file_path, record_size):
-        """
-        Generator that yields records from the binary file.
-
-        Parameters:
-            file_path (str): Path to the .bin file.
-            record_size (int): Size of each record in bytes.
-
-        Yields:
-            tuple: A tuple containing the unpacked record data, enabled channels, and laser period.
-        """
-        with open(file_path, "rb") as f:
-            header = read_header(f)
-            if "channels" in header and header["channels"] is not None:
-                enabled_channels = ", ".join(
-                    ["Channel " + str(ch + 1) for ch in header["channels"]]
-                )
-            if "laser_period_ns" in header and header["laser_period_ns"] is not None:
-                laser_period = str(header["laser_period_ns"]) + "ns"
-            while True:
-                record = f.read(record_size)
-                if len(record) < record_size:
-                    break
-                yield struct.unpack("<Bdd", record), enabled_channels, laser_period
-
-    records = []
-    for i, (record, enabled_channels, laser_period) in enumerate(
-        record_generator(file_path, record_size)
-    ):
-        event, micro_time, macro_time = record
-        event_string = ""
-        if event == 70:
-            event_string = "F" # Frame
-        elif event == 76:
-            event_string = "L"  # Line
-        elif event == 80:
-            event_string = "P"  # Pixel
-        else:
-            event_string = f"ch{event + 1}" # Channel     
-        records.append((event_string, round(micro_time, 6), round(macro_time, 6)))
 
-        if (i + 1) % chunk_size == 0:
-            yield pd.DataFrame(
-                records, columns=["Event", "Micro Time (ns)", "Macro Time (ns)"]
+    with open(file_path, "rb") as f:
+        header = read_header(f)
+        enabled_channels, laser_period = header_info(header)
+        while True:
+            # A truncated trailing record is discarded
+            records = np.fromfile(f, dtype=TIME_TAGGER_RECORD_DTYPE, count=chunk_size)
+            if len(records) == 0:
+                break
+            yield time_tagger_records_to_dataframe(
+                records
             ), enabled_channels, laser_period
-            records = []
-    if records:
-        yield pd.DataFrame(
-            records, columns=["Event", "Micro Time (ns)", "Macro Time (ns)"]
-        ), enabled_channels, laser_period
+            if len(records) < chunk_size:
+                break
+
+
+def time_tagger_records_to_dataframe(records):
+    """
+    Converts decoded time tagger records into a DataFrame.
 
+    Parameters:
+        records (np.ndarray): Records with TIME_TAGGER_RECORD_DTYPE.
 
-def save_to_parquet(file_path, output_file):
+    Returns:
+        pd.DataFrame: A DataFrame with the Event (categorical), Micro Time (ns) and Macro Time (ns) columns.
+    """
+    return pd.DataFrame(
+        {
+            "Event": pd.Categorical.from_codes(
+                records["event"].astype(np.int16), categories=EVENT_CATEGORIES
+            ),
+            "Micro Time (ns)": np.round(records["micro"], 6),
+            "Macro Time (ns)": np.round(records["macro"], 6),
+        }
+    )
+
+
+def decode_time_tagger_range(file_path, data_offset, start_record, num_records):
+    """
+    Decodes a range of records of a Time Tagger binary file into a DataFrame sorted by Macro Time.
+    Records have a fixed size, so the range starts at a known byte offset and can be decoded by
+    any process independently from the others.
+
+    Parameters:
+        file_path (str): Path to the .bin file.
+        data_offset (int): Byte offset of the first record (after the header).
+        start_record (int): Index of the first record of the range.
+        num_records (int): Number of records of the range.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the data (Event, Micro Time, Macro Time) of the range.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(data_offset + start_record * TIME_TAGGER_RECORD_DTYPE.itemsize)
+        records = np.fromfile(f, dtype=TIME_TAGGER_RECORD_DTYPE, count=num_records)
+    macro = records["macro"]
+    if np.any(macro[1:] < macro[:-1]):
+        records = records[np.argsort(macro, kind="stable")]
+    return time_tagger_records_to_dataframe(records)
+
+
+def read_time_tagger_bin_parallel(file_path, chunk_size=1000000, num_workers=None):
+    """
+    Reads data from a Time Tagger binary file (.bin) using a pool of processes.
+    The file is split into ranges of chunk_size records aligned to the 17 bytes records, every
+    range is decoded and sorted by a worker process and the chunks are yielded in file order.
+    At most 2 chunks per worker are held in memory.
+
+    Parameters:
+        file_path (str): Path to the .bin file.
+        chunk_size (int): Number of records per chunk (default is 1000000).
+        num_workers (int): Number of worker processes (default is the number of CPUs).
+
+    Yields:
+        pd.DataFrame: A DataFrame containing the data (Event, Micro Time, Macro Time) for each chunk.
+        str: Enabled channels information.
+        str: Laser period information.
+    """
+    if not os.path.exists(file_path):
+        print(Fore.RED + f"File not found: {file_path}")
+        return
+    with open(file_path, "rb") as f:
+        header = read_header(f)
+        data_offset = f.tell()
+    enabled_channels, laser_period = header_info(header)
+    # A truncated trailing record is discarded
+    total_records = (
+        os.path.getsize(file_path) - data_offset
+    ) // TIME_TAGGER_RECORD_DTYPE.itemsize
+    num_workers = num_workers or os.cpu_count() or 1
+    starts = iter(range(0, total_records, chunk_size))
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        pending = deque()
+        try:
+            for start in starts:
+                pending.append(
+                    executor.submit(
+                        decode_time_tagger_range,
+                        file_path,
+                        data_offset,
+                        start,
+                        min(chunk_size, total_records - start),
+                    )
+                )
+                if len(pending) >= 2 * num_workers:
+                    yield pending.popleft().result(), enabled_channels, laser_period
+            while pending:
+                yield pending.popleft().result(), enabled_channels, laser_period
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def write_sorted_runs(chunks, runs_file, metadata):
+    """
+    Writes the chunks to a Parquet file as runs of row groups sorted by Macro Time.
+    Each chunk is sorted only if needed, and rows of a chunk that overlap the start of the
+    next one are carried over and merged with it, so nearly sorted acquisitions end up in a
+    single run. A new run starts whenever the order can not be kept.
+
+    Parameters:
+        chunks (iterable): DataFrames yielded by read_time_tagger_bin.
+        runs_file (str): Path to the Parquet file where the runs are written.
+        metadata (dict): Metadata added to the Parquet schema, read when the first row group is written.
+
+    Returns:
+        list: The runs, each one as a list of row group indices.
+    """
+    writer = None
+    runs = []
+    last_macro = -np.inf
+    num_row_groups = 0
+
+    def write_row_group(df):
+        nonlocal writer, last_macro, num_row_groups
+        if len(df) == 0:
+            return
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(
+                runs_file,
+                schema_with_metadata(table.schema, metadata),
+                compression="snappy",
+            )
+        macro = df["Macro Time (ns)"].to_numpy()
+        if not runs or macro[0] < last_macro:
+            runs.append([])
+        writer.write_table(table.cast(writer.schema), row_group_size=len(table))
+        runs[-1].append(num_row_groups)
+        num_row_groups += 1
+        last_macro = macro[-1]
+
+    pending = None
+    try:
+        for chunk in chunks:
+            macro = chunk["Macro Time (ns)"].to_numpy()
+            if np.any(macro[1:] < macro[:-1]):
+                chunk = chunk.sort_values(
+                    by="Macro Time (ns)", kind="stable", ignore_index=True
+                )
+            if pending is not None:
+                pending_macro = pending["Macro Time (ns)"].to_numpy()
+                split = np.searchsorted(
+                    pending_macro, chunk["Macro Time (ns)"].iloc[0], side="right"
+                )
+                # Carry over a small overlap only, otherwise start a new run
+                if len(pending) - split <= len(chunk):
+                    chunk = pd.concat(
+                        [pending.iloc[split:], chunk], ignore_index=True
+                    ).sort_values(by="Macro Time (ns)", kind="stable", ignore_index=True)
+                    pending = pending.iloc[:split]
+                write_row_group(pending)
+            pending = chunk
+        if pending is not None:
+            write_row_group(pending)
+    finally:
+        if writer is not None:
+            writer.close()
+    return runs
+
+
+def schema_with_metadata(schema, metadata):
+    """
+    Adds the metadata (enabled_channels and laser_period) to a Parquet schema.
+
+    Parameters:
+        schema (pa.Schema): Schema of the data.
+        metadata (dict): Metadata values, None values are skipped.
+
+    Returns:
+        pa.Schema: The schema with the metadata.
+    """
+    schema_metadata = {
+        k.encode(): v.encode() for k, v in metadata.items() if v is not None
+    }
+    return schema.with_metadata({**(schema.metadata or {}), **schema_metadata})
+
+
+def write_empty_parquet(file_path, output_file):
+    """
+    Writes a Parquet file with no rows, with the schema and the metadata of the header.
+
+    Parameters:
+        file_path (str): Path to the .bin file.
+        output_file (str): Path to the output .parquet file.
+    """
+    with open(file_path, "rb") as f:
+        enabled_channels, laser_period = header_info(read_header(f))
+    metadata = {"enabled_channels": enabled_channels, "laser_period": laser_period}
+    df = time_tagger_records_to_dataframe(np.empty(0, dtype=TIME_TAGGER_RECORD_DTYPE))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(
+        table.cast(schema_with_metadata(table.schema, metadata)),
+        output_file,
+        compression="snappy",
+    )
+
+
+def merge_sorted_runs(runs_file, runs, output_file, max_rows=4000000):
+    """
+    Merges the sorted runs of a Parquet file into a single sorted Parquet file (external k-way merge).
+    At most max_rows rows are held in memory, split among the runs.
+
+    Parameters:
+        runs_file (str): Path to the Parquet file written by write_sorted_runs.
+        runs (list): The runs, each one as a list of row group indices.
+        output_file (str): Path to the output .parquet file.
+        max_rows (int): Number of rows held in memory (default is 4000000).
+    """
+    runs_parquet = pq.ParquetFile(runs_file)
+    batch_size = max(1024, max_rows // (2 * len(runs)))
+    batches = [
+        runs_parquet.iter_batches(batch_size=batch_size, row_groups=run) for run in runs
+    ]
+
+    def next_table(i):
+        batch = next(batches[i], None)
+        return pa.Table.from_batches([batch]) if batch is not None else None
+
+    buffers = [next_table(i) for i in range(len(runs))]
+    output_rows = []
+    with pq.ParquetWriter(
+        output_file, runs_parquet.schema_arrow, compression="snappy"
+    ) as writer:
+        while any(buffer is not None for buffer in buffers):
+            active = [i for i, buffer in enumerate(buffers) if buffer is not None]
+            # Rows up to the smallest buffered maximum can be written in order
+            cutoff = min(
+                buffers[i].column("Macro Time (ns)")[-1].as_py() for i in active
+            )
+            for i in active:
+                macro = buffers[i].column("Macro Time (ns)").to_numpy()
+                split = np.searchsorted(macro, cutoff, side="right")
+                output_rows.append(buffers[i].slice(0, split))
+                buffers[i] = (
+                    buffers[i].slice(split) if split < len(macro) else next_table(i)
+                )
+            if sum(len(table) for table in output_rows) >= batch_size or not any(
+                buffer is not None for buffer in buffers
+            ):
+                table = pa.concat_tables(output_rows)
+                order = np.argsort(
+                    table.column("Macro Time (ns)").to_numpy(), kind="stable"
+                )
+                writer.write_table(table.take(order))
+                output_rows = []
+
+
+def save_to_parquet(file_path, output_file, num_workers=None):
     """
     Saves the data from the binary file to a Parquet file with optional metadata.
+    The data is sorted by Macro Time while streaming, with bounded memory usage.
+    The chunks are decoded and sorted by a pool of processes, pass num_workers=1 to read
+    the file in the current process.
 
     Parameters:
         file_path (str): Path to the .bin file.
         output_file (str): Path to the output .parquet file.
+        num_workers (int): Number of worker processes (default is the number of CPUs).
     """
     if not os.path.exists(file_path):
         print(Fore.RED + f"File not found: {file_path}")
@@ -126,46 +382,60 @@ def save_to_parquet(file_path, output_file):
 
     print(Fore.CYAN + f"Saving data to {output_file}...")
 
-    # Initialize variables for collecting data
-    records_list = []
-    enabled_channels = laser_period = None
+    # Metadata (enabled_channels and laser_period) is read from the first chunk
+    metadata = {}
 
-    # Set up an indeterminate progress bar (total=None)
-    with tqdm(
-        desc="Processing chunks...",
-        unit="chunk",
-        total=None,  # Indeterminate progress bar
-    ) as pbar:
-        # Process chunks and update the progress bar
-        for chunk, channels, period in read_time_tagger_bin(file_path):
-            records_list.append(chunk)
-            enabled_channels = channels
-            laser_period = period
+    def chunks(pbar):
+        reader = (
+            read_time_tagger_bin(file_path)
+            if num_workers == 1
+            else read_time_tagger_bin_parallel(file_path, num_workers=num_workers)
+        )
+        for chunk, channels, period in reader:
+            metadata["enabled_channels"] = channels
+            metadata["laser_period"] = period
             pbar.update(1)  # Increment the progress bar for each chunk processed
-
-    # Concatenate all data and sort
-    existing_data = pd.concat(records_list, ignore_index=True)
-    existing_data.sort_values(by="Macro Time (ns)", inplace=True)
-
-    # Save the DataFrame as Parquet and add metadata (enabled_channels and laser_period)
-    table = pa.Table.from_pandas(existing_data)
-    metadata = {"enabled_channels": enabled_channels, "laser_period": laser_period}
-    table = table.replace_schema_metadata(
-        {**table.schema.metadata, **{k: v.encode() for k, v in metadata.items()}}
-    )
-    pq.write_table(table, output_file, compression="snappy")
+            yield chunk
+
+    runs_file = f"{output_file}.runs"
+    try:
+        # Set up an indeterminate progress bar (total=None)
+        with tqdm(
+            desc="Processing chunks...",
+            unit="chunk",
+            total=None,  # Indeterminate progress bar
+        ) as pbar:
+            runs = write_sorted_runs(chunks(pbar), runs_file, metadata)
+
+        if len(runs) > 1:
+            print(Fore.CYAN + f"Merging {len(runs)} sorted runs...")
+            merge_sorted_runs(runs_file, runs, output_file)
+        elif len(runs) == 1:
+            # Already sorted, the runs file is the output
+            os.replace(runs_file, output_file)
+        else:
+            print(Fore.YELLOW + f"No records found in {file_path}.")
+            write_empty_parquet(file_path, output_file)
+    except BaseException:
+        # Do not leave a partial output, it would be skipped as already saved
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    finally:
+        if os.path.exists(runs_file):
+            os.remove(runs_file)
     print(Fore.GREEN + f"Data and metadata saved to {output_file}.")
 
 
 def read_from_parquet(parquet_file):
     """
-    Reads data and metadata from a Parquet file.
+    Opens a Parquet file and reads its metadata, the rows are read by display_data.
 
     Parameters:
         parquet_file (str): Path to the .parquet file.
 
     Returns:
-        pd.DataFrame: DataFrame containing the data from the Parquet file.
+        pq.ParquetFile: The opened Parquet file.
         str: Enabled channels information.
         str: Laser period information.
     """
@@ -175,9 +445,9 @@ def read_from_parquet(parquet_file):
 
     print(Fore.CYAN + f"Reading data from {parquet_file}...")
 
-    # Read the Parquet file
-    table = pq.read_table(parquet_file)
-    metadata = table.schema.metadata
+    # Open the Parquet file, only the footer is read
+    parquet = pq.ParquetFile(parquet_file)
+    metadata = parquet.schema_arrow.metadata or {}
 
     # Retrieve metadata
     enabled_channels = (
@@ -194,17 +464,60 @@ def read_from_parquet(parquet_file):
     print(Fore.GREEN + f"Laser period: {laser_period}")
     print("\n")
 
-    # Convert the table to a DataFrame
-    df = table.to_pandas()
-    return df, enabled_channels, laser_period
+    return parquet, enabled_channels, laser_period
+
 
+def read_overview(parquet, num_rows=5):
+    """
+    Reads the first and last rows of a Parquet file.
+    Only the row groups holding them are read.
+
+    Parameters:
+        parquet (pq.ParquetFile): The Parquet file.
+        num_rows (int): Number of rows of the head and of the tail (default is 5).
 
-def display_data(df):
+    Returns:
+        pd.DataFrame: The first rows.
+        pd.DataFrame: The last rows.
     """
-    Displays the data from the DataFrame according to user preferences.
+    head = next(parquet.iter_batches(batch_size=num_rows), None)
+    if head is None:
+        empty = parquet.schema_arrow.empty_table().to_pandas()
+        return empty, empty
+    tail_groups = []
+    tail_rows = 0
+    row_group = parquet.num_row_groups
+    while row_group > 0 and tail_rows < num_rows:
+        row_group -= 1
+        tail_groups.insert(0, parquet.read_row_group(row_group))
+        tail_rows += tail_groups[0].num_rows
+    tail = pa.concat_tables(tail_groups)
+    tail = tail.slice(max(tail.num_rows - num_rows, 0))
+    return head.to_pandas(), tail.to_pandas()
+
+
+def display_overview(parquet):
+    """
+    Displays the first and last rows of a Parquet file.
 
     Parameters:
-        df (pd.DataFrame): DataFrame containing the data to be displayed.
+        parquet (pq.ParquetFile): The Parquet file.
+    """
+    head, tail = read_overview(parquet)
+    print("\n")
+    print(Fore.GREEN + head.to_string(index=False))
+    print("\n...\n")
+    print(Fore.GREEN + tail.to_string(index=False))
+    print("\n")
+
+
+def display_data(parquet):
+    """
+    Displays the data of a Parquet file according to user preferences.
+    The rows are read one chunk at a time, the file is never loaded whole.
+
+    Parameters:
+        parquet (pq.ParquetFile): The Parquet file to be displayed.
     """
     # Choose the display option
     print(Fore.CYAN + "Choose display option:")
@@ -217,24 +530,22 @@ def display_data(df):
 
     if choice == "1":
         print(Fore.CYAN + "Showing an overview of the data:")
-        print("\n")
-        print(Fore.GREEN + df.head().to_string(index=False))
-        print("\n...\n")
-        print(Fore.GREEN + df.tail().to_string(index=False))
-        print("\n")
+        display_overview(parquet)
     elif choice == "2":
         # Ask the user for the maximum number of rows per chunk
         max_rows = int(
             input(Fore.CYAN + "Enter the maximum number of rows to read per chunk: ")
         )
 
-        # Display the data in chunks to avoid memory overload
-        for start in range(0, len(df), max_rows):
-            end = min(start + max_rows, len(df))
+        # Read and display the data in chunks to avoid memory overload
+        num_rows = parquet.metadata.num_rows
+        end = 0
+        for batch in parquet.iter_batches(batch_size=max_rows):
+            end += batch.num_rows
             print("\n")
-            print(Fore.GREEN + df.iloc[start:end].to_string(index=False))
+            print(Fore.GREEN + batch.to_pandas().to_string(index=False))
             print("\n")
-            if end < len(df):
+            if end < num_rows:
                 # Wait for the user to press Enter before loading the next chunk or type 'exit' to quit
                 user_input = input(
                     Fore.CYAN
@@ -245,47 +556,35 @@ def display_data(df):
                     break
     else:
         print(Fore.RED + "Invalid choice. Showing default overview.")
-        print("\n")
-        print(Fore.GREEN + df.head().to_string(index=False))
-        print("\n...\n")
-        print(Fore.GREEN + df.tail().to_string(index=False))
-        print("\n")
+        display_overview(parquet)
 
 
 def read_bin_and_display(file_path):
     """
     Reads data directly from the binary file and displays it.
+    The data is sorted through a temporary Parquet file, removed after displaying.
 
     Parameters:
         file_path (str): Path to the .bin file.
     """
-    records_list = []
-    enabled_channels = laser_period = None
-
-    # Set up an indeterminate progress bar (total=None)
-    with tqdm(
-        desc="Processing chunks...",
-        unit="chunk",
-        total=None,  # Indeterminate progress bar
-    ) as pbar:
-        # Process chunks
-        for chunk, channels, period in read_time_tagger_bin(file_path):
-            records_list.append(chunk)
-            enabled_channels = channels
-            laser_period = period
-            pbar.update(1)  # Increment the progress bar for each chunk processed
-
-    # Concatenate all data and sort
-    existing_data = pd.concat(records_list, ignore_index=True)
-    existing_data.sort_values(by="Macro Time (ns)", inplace=True)
-
-    print("\n")
-    print(Fore.GREEN + f"Enabled channels: {enabled_channels}")
-    print(Fore.GREEN + f"Laser period: {laser_period}")
-    print("\n")
-
-    # Display the data
-    display_data(existing_data)
+    fd, temp_parquet_file = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    os.remove(temp_parquet_file)
+    parquet = None
+    try:
+        save_to_parquet(file_path, temp_parquet_file)
+        result = read_from_parquet(temp_parquet_file)
+        if result is None:
+            return
+        parquet, enabled_channels, laser_period = result
+
+        # Display the data
+        display_data(parquet)
+    finally:
+        if parquet is not None:
+            parquet.close()
+        if os.path.exists(temp_parquet_file):
+            os.remove(temp_parquet_file)
 
 
 def main():
@@ -303,13 +602,16 @@ def main():
 
     if save_choice == "yes":
         save_to_parquet(file_path, parquet_file)
-        df, enabled_channels, laser_period = read_from_parquet(parquet_file)
-        display_data(df)
+        result = read_from_parquet(parquet_file)
+        if result is None:
+            return
+        parquet, enabled_channels, laser_period = result
+        display_data(parquet)
     else:
         if os.path.exists(parquet_file):
             print(Fore.CYAN + f".parquet file found: {parquet_file}.")
-            df, enabled_channels, laser_period = read_from_parquet(parquet_file)
-            display_data(df)
+            parquet, enabled_channels, laser_period = read_from_parquet(parquet_file)
+            display_data(parquet)
         else:
             print(Fore.CYAN + f"Loading data from .bin file...")
             read_bin_and_display(file_path)
@@ -1,8 +1,8 @@
 import json
-import struct
 import matplotlib.pyplot as plt
 import numpy as np
 
+from components.columnar_file import read_phasors_file, sum_spectroscopy_file
 from components.helpers import ns_to_mhz
 
 
@@ -16,72 +16,24 @@ def extract_metadata(file_path, magic_number):
 
 
 def load_data(file_path, selected_channels):
-    data = {}
-    with open(file_path, "rb") as f:
-        assert f.read(4) == b"SP01"
-        header_length = int.from_bytes(f.read(4), byteorder="little")
-        header = f.read(header_length)
-        metadata = json.loads(header)
-        selected_channels = metadata["channels"]
-        while True:
-            time_ns = f.read(8)
-            if not time_ns:
-                print("End of file data")
-                break
-            for channel in selected_channels:
-                current_curve = [
-                    int.from_bytes(f.read(4), byteorder="little") for _ in range(256)
-                ]
-                data[channel] = data.get(channel, [0 for _ in range(256)])
-                data[channel] = [sum(x) for x in zip(data[channel], current_curve)]
-    return data
+    metadata, _, decays = sum_spectroscopy_file(file_path)
+    return {channel: decays[i] for i, channel in enumerate(metadata["channels"])}
 
 
 def load_phasors(file_path, selected_channels):
-    data = {}
-    with open(file_path, "rb") as f:
-        assert f.read(4) == b"SPF1"
-        header_length = int.from_bytes(f.read(4), byteorder="little")
-        header = f.read(header_length)
-        metadata = json.loads(header)
-        while True:
-            for channel in selected_channels:
-                if channel not in data:
-                    data[channel] = {}
-
-                for harmonic in range(1, metadata["harmonics"] + 1):
-                    if harmonic not in data[channel]:
-                        data[channel][harmonic] = []
-
-                    bytes_read = f.read(32)
-                    if not bytes_read:
-                        print("End of file phasors")
-                        return data  # Exit the function if no more data
-
-                    # Unpack the read bytes
-                    try:
-                        time_ns, channel_name, harmonic_name, g, s = struct.unpack(
-                            "QIIdd", bytes_read
-                        )
-                    except struct.error as e:
-                        print(f"Error unpacking data: {e}")
-                        return data
-
-                    data[channel][harmonic].append((g, s))
-    return data
+    _, phasors_data = read_phasors_file(file_path, channels=selected_channels)
+    return phasors_data
 
 
 def plot_phasors(data):
     fig, ax = plt.subplots()
 
-    harmonic_colors = plt.cm.viridis(
-        np.linspace(0, 1, max(h for ch in data.values() for h in ch.keys()))
-    )
+    harmonic_colors = plt.cm.viridis(np.linspace(0, 1, max(data.harmonics)))
     harmonic_colors_dict = {
         harmonic: color for harmonic, color in enumerate(harmonic_colors, 1)
     }
 
-    for channel, harmonics in data.items():
+    for channel, harmonics in data.grouped().items():
         theta = np.linspace(0, np.pi, 100)
         x = np.cos(theta)
         y = np.sin(theta)
@@ -89,13 +41,9 @@ def plot_phasors(data):
         # Plot semi-circle for the channel
         ax.plot(x, y, label=f"Channel: {channel}")
 
-        for harmonic, values in harmonics.items():
-            if values:  # Ensure there are values to plot
-                g_values, s_values = zip(*values)
-
+        for harmonic, (g_values, s_values) in harmonics.items():
+            if len(g_values) > 0:  # Ensure there are values to plot
                 # Filter out extreme values to prevent overflow
-                g_values = np.array(g_values)
-                s_values = np.array(s_values)
                 mask = (np.abs(g_values) < 1e9) & (np.abs(s_values) < 1e9)
                 g_values = g_values[mask]
                 s_values = s_values[mask]
@@ -120,12 +68,12 @@ def plot_phasors_data(
     laser_period,
     active_channels,
     spectroscopy_times,
-    spectroscopy_curves,
+    spectroscopy_decays,
     selected_harmonic,
     show_plot=True,
 ):
     # plot layout config
-    num_channels = len(phasors_data)
+    num_channels = len(phasors_data.channels)
     max_channels_per_row = 3
     num_rows = (num_channels + max_channels_per_row - 1) // max_channels_per_row
     fig, axs = plt.subplots(
@@ -149,7 +97,7 @@ def plot_phasors_data(
     total_max = 0
     total_min = 9999999999999
     for i in range(len(active_channels)):
-        sum_curve = np.sum(spectroscopy_curves[i], axis=0)
+        sum_curve = spectroscopy_decays[i]
         max_val = np.max(sum_curve)
         min_val = np.min(sum_curve)
         if max_val > total_max:
@@ -161,7 +109,7 @@ def plot_phasors_data(
     ax.set_xlim(0, laser_period)
     ax.legend()
     # Phasors plots
-    for i, (channel, harmonics) in enumerate(phasors_data.items(), start=1):
+    for i, (channel, harmonics) in enumerate(phasors_data.grouped().items(), start=1):
         row = i // max_channels_per_row
         col = i % max_channels_per_row
         ax = axs[row, col]
@@ -170,13 +118,10 @@ def plot_phasors_data(
         ax.plot(x, y)
         ax.set_aspect('equal') 
         # Plot only the selected harmonic
-        for harmonic, values in harmonics.items():
+        for harmonic, (g_values, s_values) in harmonics.items():
             if selected_harmonic is not None and harmonic != selected_harmonic:
                 continue  # Skip non-selected harmonics
-            if values:
-                g_values, s_values = zip(*values)
-                g_values = np.array(g_values)
-                s_values = np.array(s_values)
+            if len(g_values) > 0:
                 mask = (np.abs(g_values) < 1e9) & (np.abs(s_values) < 1e9)
                 g_values = g_values[mask]
                 s_values = s_values[mask]
@@ -230,7 +175,7 @@ def plot_phasors_data(
     return fig
 
 
-def plot_spectroscopy_data(channel_curves, times, metadata, show_plot=True):
+def plot_spectroscopy_data(channels_decays, times, metadata, show_plot=True):
     fig, ax = plt.subplots()
     ax.set_xlabel(f"Time (ns, Laser period = {metadata['laser_period_ns']} ns)")
     ax.set_ylabel("Intensity")
@@ -247,8 +192,8 @@ def plot_spectroscopy_data(channel_curves, times, metadata, show_plot=True):
     # plot all channels summed up
     total_max = 0
     total_min = float("inf")
-    for i in range(len(channel_curves)):
-        sum_curve = np.sum(channel_curves[i], axis=0)
+    for i in range(len(channels_decays)):
+        sum_curve = channels_decays[i]
         max_value = np.max(sum_curve)
         min_value = np.min(sum_curve)
         if max_value > total_max:
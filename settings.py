@@ -105,10 +105,15 @@ SETTINGS_PHASORS_RESOLUTION = "phasors_resolution"
 DEFAULT_PHASORS_RESOLUTION = 2
 SETTINGS_QUANTIZE_PHASORS = "quantize_phasors"
 DEFAULT_QUANTIZE_PHASORS = True
+SETTINGS_RENDER_FPS = "render_fps"
+DEFAULT_RENDER_FPS = 30
+SETTINGS_PHASORS_LOD_THRESHOLD = "phasors_lod_threshold"
+DEFAULT_PHASORS_LOD_THRESHOLD = 200000
 
 
 READER_POPUP = "reader_popup"
 READER_METADATA_POPUP = "reader_metadata_popup"
+TIME_TAGGER_READER_POPUP = "time_tagger_reader_popup"
 FITTING_POPUP = "fitting_popup"
 
 SETTINGS_ACQUIRE_READ_MODE = "acquire_read_mode"
@@ -135,7 +140,7 @@ READER_DATA = {
         "phasors_metadata": {},
         "plots": [],
         "metadata": {},
-        "data": {"phasors_data": {}, "spectroscopy_data": {}},
+        "data": {"phasors_data": {}, "phasors_summary": {}, "spectroscopy_data": {}},
     },
     "fitting": {
         "files": {"spectroscopy": "", "fitting": ""},
@@ -1,10 +1,10 @@
 from copy import deepcopy
 from functools import partial
 import json
+import multiprocessing
 import os
 import queue
 import sys
-import time
 from math import floor, log
 
 import flim_labs
@@ -27,6 +27,7 @@ from PyQt6.QtWidgets import (
     QFileDialog,
 )
 
+from components.acquisition_consumer import AcquisitionConsumer
 from components.animations import VibrantAnimation
 from components.box_message import BoxMessage
 from components.buttons import (
@@ -36,6 +37,7 @@ from components.buttons import (
 )
 from components.channels_detection import DetectChannelsButton
 from components.check_card import CheckCard
+from components.decay_accumulators import DecayAccumulators
 from components.export_data import ExportData
 from components.fancy_checkbox import FancyButton
 from components.fitting_config_popup import FittingDecayConfigPopup
@@ -43,10 +45,12 @@ from components.gradient_text import GradientText
 from components.gui_styles import GUIStyles
 from components.helpers import calc_SBR, format_size, get_realtime_adjustment_value, mhz_to_ns, ns_to_mhz
 from components.input_number_control import InputNumberControl, InputFloatControl
+from components.intensity_trace_buffer import IntensityTraceBuffer
 from components.layout_utilities import draw_layout_separator, hide_layout, show_layout
 from components.lin_log_control import LinLogControl
 from components.link_widget import LinkWidget
 from components.logo_utilities import OverlayWidget, TitlebarIcon
+from components.phasors_points_store import PhasorsPoints, phasors_density_bins
 from components.plots_config import PlotsConfigPopup
 from components.progress_bar import ProgressBar
 from components.read_data import (
@@ -62,6 +66,7 @@ from components.spectroscopy_curve_time_shift import SpectroscopyTimeShift
 from components.switch_control import SwitchControl
 from components.sync_in_popup import SyncInDialog
 from components.time_tagger import TimeTaggerController
+from components.time_tagger_popup import TimeTaggerReaderPopup
 from settings import *
 
 current_path = os.path.dirname(os.path.abspath(__file__))
@@ -86,6 +91,7 @@ class SpectroscopyWindow(QWidget):
         self.acquisition_stopped = False
         self.intensities_widgets = {}
         self.intensity_lines = INTENSITY_LINES
+        self.intensity_buffers = {}
         self.phasors_charts = {}
         self.phasors_widgets = {}
         self.phasors_coords = {}
@@ -94,6 +100,8 @@ class SpectroscopyWindow(QWidget):
         self.phasors_colorbars = {}
         self.phasors_legends = {}
         self.phasors_clusters_center = {}
+        self.phasors_ellipses = {}
+        self.phasors_density_images = {}
         self.phasors_crosshairs = {}
         self.quantization_images = {}
         self.SBR_items = {}
@@ -104,6 +112,7 @@ class SpectroscopyWindow(QWidget):
         self.decay_curves = DECAY_CURVES
         self.decay_widgets = {}
         self.cached_decay_values = CACHED_DECAY_VALUES
+        self.decay_accumulators = DecayAccumulators()
         self.spectroscopy_axis_x = np.arange(1)
         self.lin_log_switches = {}
         default_time_shifts = self.settings.value(
@@ -184,8 +193,9 @@ class SpectroscopyWindow(QWidget):
         self.all_phasors_points = self.get_empty_phasors_points()
         self.overlay = OverlayWidget(self)
         self.installEventFilter(self)
+        self.acquisition_consumer = None
         self.pull_from_queue_timer = QTimer()
-        self.pull_from_queue_timer.timeout.connect(self.pull_from_queue)
+        self.pull_from_queue_timer.timeout.connect(self.render_acquisition_snapshot)
         self.fitting_config_popup = None
         self.calc_exported_file_size()
         self.phasors_harmonic_selected = 1
@@ -199,11 +209,16 @@ class SpectroscopyWindow(QWidget):
         self.check_card_connection()
         
 
-    @staticmethod
-    def get_empty_phasors_points():
+    def get_empty_phasors_points(self):
+        bins = int(PHASORS_RESOLUTIONS[self.phasors_resolution])
         empty = []
         for i in range(8):
-            empty.append({1: [], 2: [], 3: [], 4: []})
+            empty.append(
+                {
+                    harmonic: PhasorsPoints(histogram_bins=bins)
+                    for harmonic in (1, 2, 3, 4)
+                }
+            )
         return empty
 
     def init_ui(self):
@@ -658,12 +673,22 @@ class SpectroscopyWindow(QWidget):
         self.control_inputs["read_bin_button"] = read_bin_button
         read_bin_button.clicked.connect(self.open_reader_popup)
         read_bin_button.setVisible(self.acquire_read_mode == "read")
+        # TIME TAGGER READER BUTTON
+        time_tagger_reader_button = QPushButton("TIME TAGGER")
+        time_tagger_reader_button.setObjectName("btn")
+        time_tagger_reader_button.setFlat(True)
+        time_tagger_reader_button.setFixedHeight(55)
+        time_tagger_reader_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.control_inputs["time_tagger_reader_button"] = time_tagger_reader_button
+        time_tagger_reader_button.clicked.connect(self.open_time_tagger_reader_popup)
+        time_tagger_reader_button.setVisible(self.acquire_read_mode == "read")
         self.style_start_button()
         collapse_button = CollapseButton(self.widgets[TOP_COLLAPSIBLE_WIDGET])
         controls_row.addWidget(start_button)
         controls_row.addWidget(bin_metadata_button)
         controls_row.addWidget(export_plot_img_button)
         controls_row.addWidget(read_bin_button)
+        controls_row.addWidget(time_tagger_reader_button)
         controls_row.addWidget(collapse_button)
         self.widgets["collapse_button"] = collapse_button
         controls_row.addSpacing(10)
@@ -706,6 +731,7 @@ class SpectroscopyWindow(QWidget):
 
     def style_start_button(self):
         GUIStyles.set_start_btn_style(self.control_inputs["read_bin_button"])
+        GUIStyles.set_start_btn_style(self.control_inputs["time_tagger_reader_button"])
         if self.mode == MODE_STOPPED:
             self.control_inputs["start_button"].setText("START")
             GUIStyles.set_start_btn_style(self.control_inputs["start_button"])
@@ -976,8 +1002,7 @@ class SpectroscopyWindow(QWidget):
                     del self.phasors_colorbars[channel_index]
             if len(self.plots_to_show) <= len(self.all_phasors_points):
                 for channel_index in self.plots_to_show:
-                    points = self.all_phasors_points[channel_index][harmonic_value]
-                    self.draw_points_in_phasors(channel_index, harmonic_value, points)
+                    self.draw_points_in_phasors(channel_index, harmonic_value)
 
     def on_phasors_resolution_changed(self, value):
         self.phasors_resolution = int(value)
@@ -1458,6 +1483,10 @@ class SpectroscopyWindow(QWidget):
                 phasors_widget.setLabel("bottom", "g", units="")
                 phasors_widget.setTitle(f"Channel {channel + 1} phasors")
                 self.draw_semi_circle(phasors_widget)
+                # The density image is resampled at the screen resolution when zooming
+                phasors_widget.getPlotItem().getViewBox().sigRangeChanged.connect(
+                    lambda *args, channel=channel: self.on_phasors_view_changed(channel)
+                )
                 self.phasors_charts[channel] = phasors_widget.plot(
                     [],
                     [],
@@ -1485,19 +1514,11 @@ class SpectroscopyWindow(QWidget):
             self.grid_layout.addWidget(v_widget, i // col_length, i % col_length)
 
     def calculate_phasors_points_mean(self, channel_index, harmonic):
-        x = [p[0] for p in self.all_phasors_points[channel_index][harmonic]]
-        y = [p[1] for p in self.all_phasors_points[channel_index][harmonic]]
-        g_values = np.array(x)
-        s_values = np.array(y)
-        if (
-            g_values.size == 0
-            or s_values.size == 0
-            or np.all(np.isnan(g_values))
-            or np.all(np.isnan(s_values))
-        ):
+        # Running mean, updated with every batch of points
+        stats = self.all_phasors_points[channel_index][harmonic].stats
+        if stats.count == 0:
             return None, None
-        mean_g = np.nanmean(g_values)
-        mean_s = np.nanmean(s_values)
+        mean_g, mean_s = stats.mean
         return mean_g, mean_s
 
     def generate_phasors_cluster_center(self, harmonic):
@@ -1508,11 +1529,27 @@ class SpectroscopyWindow(QWidget):
                     self.phasors_widgets[channel_index].removeItem(
                         self.phasors_clusters_center[channel_index]
                     )
+                if channel_index in self.phasors_ellipses:
+                    self.phasors_widgets[channel_index].removeItem(
+                        self.phasors_ellipses[channel_index]
+                    )
+                    del self.phasors_ellipses[channel_index]
                 mean_g, mean_s = self.calculate_phasors_points_mean(
                     channel_index, harmonic
                 )
                 if mean_g is None or mean_s is None:
                     continue
+                # 95% confidence ellipse of the points around the center
+                ellipse = self.all_phasors_points[channel_index][
+                    harmonic
+                ].stats.confidence_ellipse()
+                if ellipse is not None:
+                    ellipse_item = pg.PlotDataItem(
+                        *ellipse, pen=pg.mkPen(color="yellow", width=2)
+                    )
+                    ellipse_item.setZValue(2)
+                    self.phasors_widgets[channel_index].addItem(ellipse_item)
+                    self.phasors_ellipses[channel_index] = ellipse_item
                 scatter = pg.ScatterPlotItem(
                     [mean_g],
                     [mean_s],
@@ -1676,6 +1713,7 @@ class SpectroscopyWindow(QWidget):
         for ch in self.plots_to_show:
             if ch in self.phasors_charts:
                 self.phasors_charts[ch].setData([], [])
+            self.remove_phasors_density(ch)
 
     def clear_phasors_features(self, feature):
         for ch in feature:
@@ -1686,6 +1724,8 @@ class SpectroscopyWindow(QWidget):
         self.clear_phasors_features(self.phasors_colorbars)
         self.clear_phasors_features(self.quantization_images)
         self.clear_phasors_features(self.phasors_clusters_center)
+        self.clear_phasors_features(self.phasors_ellipses)
+        self.clear_phasors_features(self.phasors_density_images)
         self.clear_phasors_features(self.phasors_legends)
         self.clear_phasors_features(self.phasors_lifetime_points)
         for ch in self.phasors_lifetime_texts:
@@ -1694,6 +1734,8 @@ class SpectroscopyWindow(QWidget):
         self.quantization_images.clear()
         self.phasors_colorbars.clear()
         self.phasors_clusters_center.clear()
+        self.phasors_ellipses.clear()
+        self.phasors_density_images.clear()
         self.phasors_legends.clear()
         self.phasors_lifetime_points.clear()
         self.phasors_lifetime_texts.clear()
@@ -1712,8 +1754,10 @@ class SpectroscopyWindow(QWidget):
         self.acquisition_time_countdown_widgets.clear()
         if deep_clear:
             self.intensity_lines = deepcopy(DEFAULT_INTENSITY_LINES)
+            self.intensity_buffers.clear()
             self.decay_curves = deepcopy(DEFAULT_DECAY_CURVES)
             self.cached_decay_values = deepcopy(DEFAULT_CACHED_DECAY_VALUES)
+            self.decay_accumulators.clear()
             self.clear_phasors_points()
             for ch in self.plots_to_show:
                 if self.tab_selected != TAB_PHASORS:
@@ -2037,61 +2081,118 @@ class SpectroscopyWindow(QWidget):
         self.top_bar_set_enabled(False)
         LinLogControl.set_lin_log_switches_enable_mode(self.lin_log_switches, False)
         # self.timer_update.start(18)
-        self.pull_from_queue_timer.start(25)
-        # self.pull_from_queue()
-
-    def pull_from_queue(self):
-        val = flim_labs.pull_from_queue()
-        if len(val) > 0:
-            for v in val:
-                if v == ("end",):  # End of acquisition
-                    print("Got end of acquisition, stopping")
-                    self.style_start_button()
-                    self.acquisition_stopped = True
-                    self.stop_spectroscopy_experiment()
-                    break
-                if self.mode == MODE_STOPPED:
-                    break
-                if "sp_phasors" in v[0]:
-                    channel = v[1][0]
-                    harmonic = v[2][0]
-                    phasors = v[3]
-                    channel_index = next(
-                        (item for item in self.plots_to_show if item == channel), None
+        self.start_acquisition_consumer()
+        self.pull_from_queue_timer.start(self.get_render_interval_ms())
+
+    def render_acquisition_snapshot(self):
+        # Renders the data drained by the acquisition consumer since the last frame,
+        # every channel that received packets is redrawn once with all of them
+        consumer = self.acquisition_consumer
+        if consumer is None:
+            return
+        snapshot, ended = consumer.take_snapshot()
+        if self.mode != MODE_STOPPED:
+            phasors_received = False
+            for channel_index, data in snapshot.items():
+                for harmonic, phasors in data.phasors.items():
+                    self.all_phasors_points[channel_index][harmonic].append_points(
+                        phasors
                     )
-                    if harmonic == 1:
-                        if channel_index is not None:
-                            self.draw_points_in_phasors(channel, harmonic, phasors)
-                    if channel_index is not None:
-                        self.all_phasors_points[channel_index][harmonic].extend(phasors)
-                    continue
-                try:
-                    ((channel,), (time_ns,), intensities) = v
-                except:
-                    print(v)
-                ((channel,), (time_ns,), intensities) = v
-                channel_index = next(
-                    (item for item in self.plots_to_show if item == channel), None
+                    phasors_received = True
+                    if harmonic == 1 and not self.quantized_phasors:
+                        self.draw_points_in_phasors(channel_index, harmonic)
+                if data.has_curves():
+                    self.update_intensity_plots(
+                        channel_index, data.intensity_times_ns, data.intensity_counts
+                    )
+                    self.update_plots2(channel_index, data.last_time_ns, data.decay)
+                    self.update_acquisition_countdowns(data.last_time_ns)
+                    self.update_cps(channel_index, data.last_time_ns, data.decay)
+            if phasors_received:
+                if self.quantized_phasors:
+                    # Live quantized view of the first harmonic
+                    self.quantize_phasors(
+                        1, bins=int(PHASORS_RESOLUTIONS[self.phasors_resolution])
+                    )
+                # Running statistics, no pass over the stored points
+                self.generate_phasors_cluster_center(1)
+                self.generate_phasors_legend(1)
+        if ended:
+            print("Got end of acquisition, stopping")
+            self.acquisition_consumer = None
+            self.style_start_button()
+            self.acquisition_stopped = True
+            self.stop_spectroscopy_experiment()
+
+    def get_render_interval_ms(self):
+        render_fps = int(self.settings.value(SETTINGS_RENDER_FPS, DEFAULT_RENDER_FPS))
+        return max(1, round(1000 / max(render_fps, 1)))
+
+    def start_acquisition_consumer(self):
+        self.stop_acquisition_consumer()
+        self.acquisition_consumer = AcquisitionConsumer(list(self.plots_to_show))
+        self.acquisition_consumer.start()
+
+    def stop_acquisition_consumer(self):
+        if self.acquisition_consumer is not None:
+            self.acquisition_consumer.stop()
+            self.acquisition_consumer = None
+
+    def draw_points_in_phasors(self, channel, harmonic):
+        # The chart shows views of the stored points, nothing is copied. Above the
+        # level of detail threshold a density image replaces the scatter
+        if channel in self.plots_to_show and channel in self.phasors_charts:
+            points = self.all_phasors_points[channel][harmonic]
+            lod_threshold = int(
+                self.settings.value(
+                    SETTINGS_PHASORS_LOD_THRESHOLD, DEFAULT_PHASORS_LOD_THRESHOLD
                 )
-                if channel_index is not None:
-                    self.update_plots2(channel_index, time_ns, intensities)
-                    self.update_acquisition_countdowns(time_ns)
-                    self.update_cps(channel_index, time_ns, intensities)
-                QApplication.processEvents()
-
-    def draw_points_in_phasors(self, channel, harmonic, phasors):
-        if channel in self.plots_to_show:
-            x, y = self.phasors_charts[channel].getData()
-            if x is None:
-                x = np.array([])
-                y = np.array([])
-            new_x = [p[0] for p in phasors]
-            new_y = [p[1] for p in phasors]
-            x = np.concatenate((x, new_x))
-            y = np.concatenate((y, new_y))
-            self.phasors_charts[channel].setData(x, y)
-            pass
-   
+            )
+            # Points not decoded with a file summary are never read while painting
+            if len(points) > lod_threshold or not points.has_points():
+                self.phasors_charts[channel].setData([], [])
+                self.draw_phasors_density(channel, harmonic)
+            else:
+                self.remove_phasors_density(channel)
+                g_values, s_values = points.values()
+                self.phasors_charts[channel].setData(g_values, s_values)
+
+    def draw_phasors_density(self, channel, harmonic):
+        if channel not in self.phasors_widgets:
+            return
+        view_box = self.phasors_widgets[channel].getPlotItem().getViewBox()
+        (x_min, x_max), _ = view_box.viewRange()
+        points = self.all_phasors_points[channel][harmonic]
+        bins = points.density_bins(
+            phasors_density_bins(view_box.width() / max(x_max - x_min, 1e-6))
+        )
+        histogram = points.get_histogram(bins)
+        h = histogram.counts.astype(np.float64)
+        h = h / max(np.max(h), 1)
+        h[h == 0] = np.nan
+        image_item = self.phasors_density_images.get(channel)
+        if image_item is None:
+            image_item = pg.ImageItem()
+            image_item.setLookupTable(
+                self.create_cool_colormap().getLookupTable(0, 1.0)
+            )
+            image_item.setZValue(-1)
+            self.phasors_widgets[channel].addItem(image_item, ignoreBounds=True)
+            self.phasors_density_images[channel] = image_item
+        image_item.setImage(h, levels=(0, 1))
+        image_item.resetTransform()
+        image_item.setScale(1 / bins)
+        image_item.setPos(histogram.g_range[0], histogram.s_range[0])
+
+    def on_phasors_view_changed(self, channel):
+        if channel in self.phasors_density_images and not self.quantized_phasors:
+            self.draw_phasors_density(channel, self.phasors_harmonic_selected)
+
+    def remove_phasors_density(self, channel):
+        image_item = self.phasors_density_images.pop(channel, None)
+        if image_item is not None and channel in self.phasors_widgets:
+            self.phasors_widgets[channel].removeItem(image_item)
+
     def initialize_phasor_feature(self):
         frequency_mhz = self.get_current_frequency_mhz()
         if frequency_mhz != 0:
@@ -2173,40 +2274,41 @@ class SpectroscopyWindow(QWidget):
             self.phasors_lifetime_texts[channel] = texts
 
     def quantize_phasors(self, harmonic, bins=64):
+        # The histograms are updated with every batch of points, the images are reused
         for i, channel_index in enumerate(self.plots_to_show):
-            x = [p[0] for p in self.all_phasors_points[channel_index][harmonic]]
-            y = [p[1] for p in self.all_phasors_points[channel_index][harmonic]]
-            if x is None or y is None or len(x) == 0 or len(y) == 0:
+            points = self.all_phasors_points[channel_index][harmonic]
+            if len(points) == 0 or channel_index not in self.phasors_widgets:
                 continue
-            h, xedges, yedges = np.histogram2d(
-                x, y, bins=bins * 4, range=[[-2, 2], [-2, 2]]
-            )
+            self.remove_phasors_density(channel_index)
+            histogram = points.get_histogram(bins, pinned=True)
+            h = histogram.counts.astype(np.float64)
             non_zero_h = h[h > 0]
             all_zeros = len(non_zero_h) == 0
-            h_min = np.min(non_zero_h)
+            h_min = np.min(non_zero_h) if not all_zeros else 0
             h_max = np.max(h)
-            h = h / np.max(h)
+            h = h / max(h_max, 1)
             h[h == 0] = np.nan
-            image_item = pg.ImageItem()
+            image_item = self.quantization_images.get(channel_index)
+            if image_item is None:
+                image_item = pg.ImageItem()
+                image_item.setLookupTable(
+                    self.create_cool_colormap().getLookupTable(0, 1.0)
+                )
+                image_item.setOpacity(1)
+                image_item.setZValue(-1)
+                self.phasors_widgets[channel_index].addItem(
+                    image_item, ignoreBounds=True
+                )
+                self.quantization_images[channel_index] = image_item
             image_item.setImage(h, levels=(0, 1))
-            image_item.setLookupTable(
-                self.create_cool_colormap().getLookupTable(0, 1.0)
-            )
-            image_item.setOpacity(1)
             image_item.resetTransform()
             image_item.setScale(1 / bins)
-            image_item.setPos(-2, -2)
-            if channel_index in self.quantization_images:
-                self.phasors_widgets[channel_index].removeItem(
-                    self.quantization_images[channel_index]
-                )
+            image_item.setPos(histogram.g_range[0], histogram.s_range[0])
             if channel_index in self.phasors_colorbars:
                 self.phasors_widgets[channel_index].removeItem(
                     self.phasors_colorbars[channel_index]
                 )
-            image_item.setZValue(-1)
-            self.phasors_widgets[channel_index].addItem(image_item, ignoreBounds=True)
-            self.quantization_images[channel_index] = image_item
+                del self.phasors_colorbars[channel_index]
             if not all_zeros:
                 self.generate_colorbar(channel_index, h_min, h_max)
             self.clear_phasors_points()
@@ -2342,7 +2444,7 @@ class SpectroscopyWindow(QWidget):
         scaled_number = number / k**magnitude
         return f"{int(scaled_number)}.{str(scaled_number).split('.')[1][:2]}{units[magnitude]}"
 
-    def update_intensity_plots(self, channel_index, time_ns, curve):
+    def update_intensity_plots(self, channel_index, times_ns, counts):
         bin_width_micros = int(
             self.settings.value(SETTINGS_BIN_WIDTH, DEFAULT_BIN_WIDTH)
         )
@@ -2352,25 +2454,27 @@ class SpectroscopyWindow(QWidget):
             )
             / bin_width_micros
         )
-        curve = tuple(x / adjustment for x in curve)
+        counts = np.asarray(counts) / adjustment
         if self.tab_selected in self.intensity_lines:
             if channel_index in self.intensity_lines[self.tab_selected]:
                 intensity_line = self.intensity_lines[self.tab_selected][channel_index]
                 if intensity_line is not None:
-                    x, y = intensity_line.getData()
-                    # Initialize or append data
-                    if x is None or (len(x) == 1 and x[0] == 0):
-                        x = np.array([time_ns / 1_000_000_000])
-                        y = np.array([np.sum(curve)])
-                    else:
-                        x = np.append(x, time_ns / 1_000_000_000)
-                        y = np.append(y, np.sum(curve))
+                    capacity = IntensityTraceBuffer.capacity_for(
+                        self.cached_time_span_seconds, bin_width_micros
+                    )
+                    intensity_buffer = self.intensity_buffers.get(channel_index)
+                    if (
+                        intensity_buffer is None
+                        or intensity_buffer.capacity != capacity
+                    ):
+                        intensity_buffer = IntensityTraceBuffer(capacity)
+                        self.intensity_buffers[channel_index] = intensity_buffer
+                    intensity_buffer.extend(
+                        np.asarray(times_ns) / 1_000_000_000, counts
+                    )
                     # Trim data based on time span
-                    if len(x) > 2:
-                        while x[-1] - x[0] > self.cached_time_span_seconds:
-                            x = x[1:]
-                            y = y[1:]
-                    intensity_line.setData(x, y)
+                    intensity_buffer.trim(self.cached_time_span_seconds)
+                    intensity_line.setData(*intensity_buffer.data())
 
     def update_spectroscopy_plots(self, x, y, channel_index, decay_curve):
         time_shift = (
@@ -2397,9 +2501,6 @@ class SpectroscopyWindow(QWidget):
             self.set_plot_y_range(decay_widget)
 
     def update_plots2(self, channel_index, time_ns, curve, reader_mode=False):
-        if not reader_mode:
-            # Update intensity plots
-            self.update_intensity_plots(channel_index, time_ns, curve)
         decay_curve = self.decay_curves[self.tab_selected][channel_index]
         if decay_curve is not None:
             if reader_mode:
@@ -2409,19 +2510,13 @@ class SpectroscopyWindow(QWidget):
                 if self.tab_selected == TAB_PHASORS:
                     decay_curve.setData(x, curve + y)
                 elif self.tab_selected in (TAB_SPECTROSCOPY, TAB_FITTING):
-                    last_cached_decay_value = self.cached_decay_values[
-                        self.tab_selected
-                    ][channel_index]
-                    self.cached_decay_values[self.tab_selected][channel_index] = (
-                        np.array(curve) + last_cached_decay_value
-                    )
-                    y = self.cached_decay_values[self.tab_selected][channel_index]
+                    # Summed in place, the cached decay is a view of the uint64 sum
+                    y = self.decay_accumulators.add(channel_index, curve)
+                    self.cached_decay_values[self.tab_selected][channel_index] = y
             if self.tab_selected in (TAB_SPECTROSCOPY, TAB_FITTING):
                 self.update_spectroscopy_plots(x, y, channel_index, decay_curve)
             else:
                 decay_curve.setData(x, curve + y)
-        QApplication.processEvents()
-        time.sleep(0.01)
 
     def set_plot_y_range(self, plot):
         plot.plotItem.autoRange()
@@ -2446,11 +2541,7 @@ class SpectroscopyWindow(QWidget):
             for i, channel_index in enumerate(self.plots_to_show):
                 if len(self.plots_to_show) <= len(self.all_phasors_points):
                     self.draw_points_in_phasors(
-                        channel_index,
-                        self.harmonic_selector_value,
-                        self.all_phasors_points[channel_index][
-                            self.harmonic_selector_value
-                        ],
+                        channel_index, self.harmonic_selector_value
                     )
         self.generate_phasors_cluster_center(self.harmonic_selector_value)
         self.generate_phasors_legend(self.harmonic_selector_value)
@@ -2560,6 +2651,10 @@ class SpectroscopyWindow(QWidget):
         self.popup = ReaderMetadataPopup(self, tab_selected=self.tab_selected)
         self.popup.show()
 
+    def open_time_tagger_reader_popup(self):
+        self.popup = TimeTaggerReaderPopup(self)
+        self.popup.show()
+
     def closeEvent(self, event):
         self.settings.setValue("size", self.size())
         self.settings.setValue("pos", self.pos())
@@ -2569,8 +2664,11 @@ class SpectroscopyWindow(QWidget):
             self.widgets[READER_POPUP].close()
         if READER_METADATA_POPUP in self.widgets:
             self.widgets[READER_METADATA_POPUP].close()
+        if TIME_TAGGER_READER_POPUP in self.widgets:
+            self.widgets[TIME_TAGGER_READER_POPUP].close()
         if FITTING_POPUP in self.widgets:
             self.widgets[FITTING_POPUP].close()
+        self.stop_acquisition_consumer()
         event.accept()
 
     def eventFilter(self, source, event):
@@ -2588,6 +2686,8 @@ class SpectroscopyWindow(QWidget):
 
 
 if __name__ == "__main__":
+    # required by the time tagger worker processes in the packaged executable
+    multiprocessing.freeze_support()
     # check correct app version in .ini file
     check_and_update_ini()
     # remove .pid file if exists